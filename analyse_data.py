@@ -5,6 +5,7 @@ import os
 import pandas as pd
 
 from src.analysis.analyse import Analyse
+from src.analysis.dataset_store import DatasetStore
 from src.analysis.stats import stats_into_csv, metrics_into_csv
 import src.graphics as graph
 from src.analysis.minimization import minimization
@@ -17,6 +18,13 @@ if __name__ == '__main__' :
                         action='store',
                         help='path to the e-prints folder',
                         default=PurePath('data').joinpath('dataset'))
+    parser.add_argument('--store',
+                        dest='store_path',
+                        action='store',
+                        help=('path to a store of all categories (written by '
+                              'dataset_construction.py), used instead of the '
+                              'e-prints folder'),
+                        default=None)
     parser.add_argument('--crtc_info_path',
                         action='store',
                         help='path to the file containing all information ' \
@@ -47,9 +55,14 @@ if __name__ == '__main__' :
         'CRTC': [],
     }
 
-    for file in sorted(os.listdir(args.dataset_path)):
-        # Cluster code
-        CLUSTER_CODE = file[:5]
+    # Dataset of each category: a file, or read in a single scan of the store
+    if args.store_path is None:
+        datasets = {file[:5]: args.dataset_path.joinpath(file)
+                    for file in sorted(os.listdir(args.dataset_path))}
+    else:
+        datasets = DatasetStore(args.store_path).scan()
+
+    for CLUSTER_CODE, dataset in sorted(datasets.items()):
         # Starting and ending Dates
         S_DATE = str(crtc_info['S_date'].loc[CLUSTER_CODE])
         E_DATE = str(crtc_info['E_date'].loc[CLUSTER_CODE])
@@ -61,7 +74,7 @@ if __name__ == '__main__' :
         analyse = Analyse(S_DATE,
                           E_DATE,
                           'M',
-                          args.dataset_path.joinpath(file))
+                          dataset)
 
         graph.GraphNormEPrints(analyse).save_graph(
             args.output_path.joinpath('norm_e-prints'),
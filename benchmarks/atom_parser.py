@@ -0,0 +1,129 @@
+"""Benchmark of the Atom feed parsers on recorded pages of the arXiv API.
+
+    python -m benchmarks.atom_parser --record cs.AR --pages 3
+    python -m benchmarks.atom_parser
+"""
+import argparse
+import os
+import re
+import time
+from pathlib import PurePath, Path
+import feedparser
+
+from src.query_making import atom_parser
+from src.query_making.arxiv_client import ArXivClient
+
+def feedparser_entries(text, abstracts=False):
+    """Parsing of a page as done before :mod:`src.query_making.atom_parser`,
+    used as the reference.
+
+    :param text: Atom feed returned by the arXiv API.
+    :type text: str
+
+    :param abstracts: Returns also titles and abstracts.
+    :type abstracts: bool"""
+    query_data = {'id': [],
+                  'published': [],
+                  'updated': [],
+                  'version': [],
+                  'primary_category': [],
+                  'all_categories': [],
+                  'arxiv_path': [],
+                  'http_link': []}
+    if abstracts:
+        query_data['title'] = []
+        query_data['summary'] = []
+
+    for entry in feedparser.parse(text).entries:
+        # Get information from the link
+        match = re.match('http.*/(.*)/(.*)v(.*)', entry.id)
+
+        query_data['id'].append(match.group(2))
+        query_data['published'].append(entry.published)
+        query_data['updated'].append(entry.updated)
+        query_data['version'].append(match.group(3))
+        query_data['primary_category'].append(entry.arxiv_primary_category['term'])
+        query_data['all_categories'].append([tag['term'] for tag in entry.tags])
+        query_data['arxiv_path'].append(atom_parser.get_arxiv_path(
+            match.group(2),
+            match.group(1),
+            match.group(3)))
+        query_data['http_link'].append(entry.link \
+                                  .replace('http://', 'http://export.') \
+                                  .replace('abs', 'pdf') \
+                                  + '.pdf')
+        if abstracts:
+            query_data['title'].append(' '.join(entry.title.split()))
+            query_data['summary'].append(' '.join(entry.summary.split()))
+    return query_data
+
+def record(fixtures, category, nb_pages):
+    """Saves pages of 1000 e-prints of `category` into `fixtures`."""
+    client = ArXivClient()
+    for page in range(nb_pages):
+        text = client.get({'search_query': 'cat:' + category,
+                           'start': page * 1000,
+                           'max_results': 1000,
+                           'sortBy': 'submittedDate',
+                           'sortOrder': 'ascending'})
+        with open(fixtures.joinpath('{}_{}.xml'.format(category, page)), 'w') as xml_file:
+            xml_file.write(text)
+
+def timing(parser, pages, repeat):
+    """Returns the mean time (in seconds) to parse a page."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in pages:
+            parser(text, True)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description=('Compares feedparser and the '
+                                     'streaming parser on recorded pages.'))
+    parser.add_argument('--fixtures',
+                        dest='fixtures',
+                        action='store',
+                        help='path to the folder of recorded pages (.xml)',
+                        default=PurePath('benchmarks').joinpath('fixtures'))
+    parser.add_argument('--record',
+                        dest='record',
+                        action='store',
+                        help='category to record from the arXiv API',
+                        default=None)
+    parser.add_argument('--pages',
+                        dest='pages',
+                        action='store',
+                        type=int,
+                        help='number of pages to record',
+                        default=3)
+    parser.add_argument('--repeat',
+                        dest='repeat',
+                        action='store',
+                        type=int,
+                        default=3)
+    args = parser.parse_args()
+    args.fixtures = PurePath(args.fixtures)
+    Path(args.fixtures).mkdir(parents=True, exist_ok=True)
+
+    if args.record is not None:
+        record(args.fixtures, args.record, args.pages)
+
+    pages = []
+    for file in sorted(os.listdir(args.fixtures)):
+        if file.endswith('.xml'):
+            with open(args.fixtures.joinpath(file), 'r') as xml_file:
+                pages.append(xml_file.read())
+    if len(pages) == 0:
+        raise RuntimeError('Error, no recorded page, use --record')
+
+    # Both parsers must return the same columns
+    for text in pages:
+        if feedparser_entries(text, True) != atom_parser.parse_entries(text, True):
+            raise RuntimeError('Error, parsers differ')
+
+    time_feedparser = timing(feedparser_entries, pages, args.repeat)
+    time_streaming = timing(atom_parser.parse_entries, pages, args.repeat)
+    print('Pages : {}'.format(len(pages)))
+    print('feedparser : {:.1f} ms / page'.format(time_feedparser * 1000))
+    print('streaming : {:.1f} ms / page'.format(time_streaming * 1000))
+    print('Speed-up : {:.1f}x'.format(time_feedparser / time_streaming))
@@ -0,0 +1,69 @@
+"""Benchmark of the opinion scoring of cleaned e-prints, with the Python loop
+of :meth:`src.NLP_tools.nlp.NLP.opinion` and with
+:class:`src.NLP_tools.lexicon_scorer.LexiconScorer`.
+
+    python -m benchmarks.lexicon_scorer --pdf /mnt/arxiv/arxiv/pdf/2101 --number 200
+"""
+import argparse
+import os
+import time
+from pathlib import PurePath
+
+from src.NLP_tools.nlp import NLP
+from src.NLP_tools.lexicon_scorer import LexiconScorer
+from benchmarks.nlp_worker import extract
+
+def timing(function, documents, repeat):
+    """Returns the mean time (in seconds) to score all documents and the
+    scores."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scores = function(documents)
+    return (time.perf_counter() - start) / repeat, scores
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description=('Compares the opinion scoring '
+                                     'of NLP.opinion and LexiconScorer.'))
+    parser.add_argument('--pdf',
+                        dest='pdf_path',
+                        action='store',
+                        help='path to a folder of e-prints (.pdf)',
+                        required=True)
+    parser.add_argument('--number',
+                        dest='number',
+                        action='store',
+                        type=int,
+                        help='number of e-prints to score',
+                        default=200)
+    parser.add_argument('--repeat',
+                        dest='repeat',
+                        action='store',
+                        type=int,
+                        default=5)
+    args = parser.parse_args()
+    args.pdf_path = PurePath(args.pdf_path)
+
+    files = sorted(file for file in os.listdir(args.pdf_path)
+                   if file.endswith('.pdf'))[:args.number]
+    if len(files) == 0:
+        raise RuntimeError('Error, no .pdf file in ' + str(args.pdf_path))
+
+    # Extraction and cleaning are the same in both cases, they are not timed
+    nlp = NLP()
+    scorer = LexiconScorer(nlp)
+    documents = [nlp.cleaning(extract(args.pdf_path.joinpath(file)))
+                 for file in files]
+
+    time_loop, scores_loop = timing(lambda documents: [nlp.opinion(tokens)
+                                                       for tokens in documents],
+                                    documents, args.repeat)
+    time_vector, scores_vector = timing(lambda documents: scorer.opinions(documents).tolist(),
+                                        documents, args.repeat)
+    if scores_loop != scores_vector:
+        raise RuntimeError('Error, scores differ')
+
+    nb_tokens = sum(len(tokens) for tokens in documents)
+    print('E-prints : {}; tokens : {}'.format(len(documents), nb_tokens))
+    print('NLP.opinion : {:.2f} M tokens / s'.format(nb_tokens / time_loop / 1e6))
+    print('LexiconScorer : {:.2f} M tokens / s'.format(nb_tokens / time_vector / 1e6))
+    print('Speed-up : {:.1f}x'.format(time_loop / time_vector))
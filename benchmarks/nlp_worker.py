@@ -0,0 +1,86 @@
+"""Benchmark of the per-document cost of the opinion scoring, with a new
+:class:`src.NLP_tools.nlp.NLP` per e-print (as before) and with the instance
+loaded once per worker process by :func:`src.processing.opinion.init_worker`.
+
+    python -m benchmarks.nlp_worker --pdf /mnt/arxiv/arxiv/pdf/2101 --number 50
+"""
+import argparse
+import os
+import time
+from pathlib import PurePath
+import fitz
+
+from src.NLP_tools.nlp import NLP
+from src.processing import opinion
+
+def extract(path):
+    """Returns the text of a .pdf file."""
+    pdf_file = fitz.open(str(path))
+    text = ''.join([page.getText() for page in pdf_file])
+    pdf_file.close()
+    return text
+
+def per_document(texts):
+    """Scores each text with a new NLP instance, returns the scores."""
+    scores = []
+    for text in texts:
+        nlp = NLP()
+        scores.append(nlp.opinion(nlp.cleaning(text)))
+    return scores
+
+def per_process(texts):
+    """Scores each text with the NLP instance of the process, returns the
+    scores."""
+    opinion.init_worker()
+    return [opinion.nlp.opinion(opinion.nlp.cleaning(text)) for text in texts]
+
+def timing(function, texts, repeat):
+    """Returns the mean time (in seconds) per document and the scores."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scores = function(texts)
+    return (time.perf_counter() - start) / (repeat * len(texts)), scores
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description=('Compares the opinion scoring '
+                                     'with an NLP instance per e-print and per '
+                                     'process.'))
+    parser.add_argument('--pdf',
+                        dest='pdf_path',
+                        action='store',
+                        help='path to a folder of e-prints (.pdf)',
+                        required=True)
+    parser.add_argument('--number',
+                        dest='number',
+                        action='store',
+                        type=int,
+                        help='number of e-prints to score',
+                        default=50)
+    parser.add_argument('--repeat',
+                        dest='repeat',
+                        action='store',
+                        type=int,
+                        default=3)
+    args = parser.parse_args()
+    args.pdf_path = PurePath(args.pdf_path)
+
+    files = sorted(file for file in os.listdir(args.pdf_path)
+                   if file.endswith('.pdf'))[:args.number]
+    if len(files) == 0:
+        raise RuntimeError('Error, no .pdf file in ' + str(args.pdf_path))
+
+    # Extraction is the same in both cases, it is timed apart
+    start = time.perf_counter()
+    texts = [extract(args.pdf_path.joinpath(file)) for file in files]
+    time_extract = (time.perf_counter() - start) / len(texts)
+
+    time_before, scores_before = timing(per_document, texts, args.repeat)
+    time_after, scores_after = timing(per_process, texts, args.repeat)
+    if scores_before != scores_after:
+        raise RuntimeError('Error, scores differ')
+
+    print('E-prints : {}'.format(len(texts)))
+    print('Extraction : {:.1f} ms / e-print'.format(time_extract * 1000))
+    print('NLP per e-print : {:.1f} ms / e-print'.format(time_before * 1000))
+    print('NLP per process : {:.1f} ms / e-print'.format(time_after * 1000))
+    print('Speed-up of the scoring : {:.1f}x'.format(time_before / time_after))
@@ -1,8 +1,30 @@
 """Script to merge dataset into a single one."""
 import argparse
 import os
+from multiprocessing import Pool
 from pathlib import PurePath, Path
-import pandas as pd
+
+from src.analysis.dataset import category_files, merge_category, to_typed, write_dataset
+from src.analysis.dataset_store import DatasetStore
+
+def build_dataset(task):
+    """Merges the files of a category and writes its dataset, returns the
+    category and its number of e-prints.
+
+    :param task: category, paths to its e-prints, cyber e-prints and opinion
+        files, output folder (or store) and format of the dataset.
+    :type task: tuple"""
+    category, paths, output_path, file_format = task
+    merged_df = merge_category(*paths)
+    # Write it into a new file
+    if file_format == 'store':
+        DatasetStore(output_path).write(category, to_typed(merged_df))
+    elif file_format == 'parquet':
+        write_dataset(to_typed(merged_df),
+                      output_path.joinpath(category + '.parquet'))
+    else:
+        merged_df.to_csv(output_path.joinpath(category + '.csv'), mode='w')
+    return category, len(merged_df)
 
 if __name__ == '__main__' :
     # Get args
@@ -23,6 +45,18 @@ if __name__ == '__main__' :
                         dest='output_path',
                         action='store',
                         default=PurePath('data').joinpath('dataset'))
+    parser.add_argument('--format',
+                        dest='format',
+                        action='store',
+                        choices=['parquet', 'csv'],
+                        help='format of the dataset files, parquet files have typed columns',
+                        default='parquet')
+    parser.add_argument('--store',
+                        dest='store_path',
+                        action='store',
+                        help=('path to a store of all categories, written '
+                              'instead of a file per category'),
+                        default=None)
     args = parser.parse_args()
 
     # Cleaning path for Windows compatibility
@@ -31,34 +65,22 @@ if __name__ == '__main__' :
     args.opinion_path = PurePath(args.opinion_path)
     args.output_path = PurePath(args.output_path)
 
-    # Get path
-    e_prints_files = sorted(os.listdir(args.e_prints_path))
-    cyber_e_prints_files = sorted(os.listdir(args.cyber_eprints_path))
-    opinion_files = sorted(os.listdir(args.opinion_path))
-
-    # mkdir
-    Path(args.output_path).mkdir(parents=True, exist_ok=True)
+    # Files of each category, matched by CRTC code
+    files = category_files(args.e_prints_path,
+                           args.cyber_eprints_path,
+                           args.opinion_path)
 
-    files_path = []
-    for q_file, c_q_file, s_file, in zip(e_prints_files,
-                                         cyber_e_prints_files,
-                                         opinion_files):
-        # Open all files
-        df_eprints = pd.read_csv(args.e_prints_path.joinpath(q_file),
-                                 index_col=0,
-                                 dtype='str')
-        df_ceprints = pd.read_csv(args.cyber_eprints_path.joinpath(c_q_file),
-                                  index_col=0,
-                                  dtype='str')
-        df_opinion = pd.read_csv(args.opinion_path.joinpath(s_file),
-                                 index_col=0,
-                                 dtype='str').sort_index()
+    if args.store_path is None:
+        output_path, file_format = args.output_path, args.format
+    else:
+        output_path, file_format = PurePath(args.store_path), 'store'
 
-        df_ceprints['cyber'] = [True for _ in range(len(df_ceprints))]
+    # mkdir
+    Path(output_path).mkdir(parents=True, exist_ok=True)
 
-        # Create the final dataset
-        merged_df = df_eprints.merge(df_ceprints[['id', 'cyber']],
-                                     how='left',
-                                     on='id').fillna('False').join(df_opinion)
-        # Write it into a new file
-        merged_df.to_csv(args.output_path.joinpath(q_file), mode='w')
+    # One category per process
+    tasks = [(category, category_paths, output_path, file_format)
+             for category, category_paths in files.items()]
+    with Pool(max(1, min(len(tasks), len(os.sched_getaffinity(0))))) as pool:
+        for category, rows in pool.imap_unordered(build_dataset, tasks):
+            print('Category : {}; {} e-prints'.format(category, rows))
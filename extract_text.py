@@ -0,0 +1,87 @@
+"""Extracts once the text of the e-prints into a text corpus, read by
+processing_queries.py --corpus: the opinion can then be computed again (e.g.
+with a new cleaning or lexicon) without reading the PDF."""
+import argparse
+import os
+from multiprocessing import Pool
+from pathlib import PurePath
+import pandas as pd
+
+from src.processing.opinion_cache import OpinionCache
+from src.processing.arxiv_manifest import ArXivManifest
+from src.processing.text_corpus import TextCorpus, extract_document
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description=('Extracts the text of the '
+                                     'e-prints into a text corpus.'))
+    parser.add_argument('--arxiv',
+                        dest='arxiv_path',
+                        action='store',
+                        help='path to the arxiv folder',
+                        default=PurePath('/mnt/arxiv'))
+    parser.add_argument('--eprints',
+                        dest='eprints_path',
+                        action='store',
+                        help='path to the e-prints folder',
+                        default=PurePath('data').joinpath('query_e-prints_2021_11_11'))
+    parser.add_argument('--corpus',
+                        dest='corpus_path',
+                        action='store',
+                        help='path to the text corpus folder',
+                        default=PurePath('data').joinpath('text_corpus'))
+    parser.add_argument('--maxtasks',
+                        dest='max_tasks',
+                        action='store',
+                        type=int,
+                        help='number of e-prints processed by a worker before it is replaced',
+                        default=1000)
+    args = parser.parse_args()
+
+    # Cleaning path for Windows compatibility
+    args.arxiv_path = PurePath(args.arxiv_path)
+    args.eprints_path = PurePath(args.eprints_path)
+    args.corpus_path = PurePath(args.corpus_path)
+
+    # Paths of the e-prints of all categories, each e-print once
+    paths = {}
+    for query in sorted(file for file in os.listdir(args.eprints_path)
+                        if file.endswith('.csv')):
+        df = pd.read_csv(args.eprints_path.joinpath(query),
+                         usecols=['arxiv_path'],
+                         dtype='str')
+        for arxiv_path in df['arxiv_path']:
+            path = args.arxiv_path.joinpath(arxiv_path)
+            paths[OpinionCache.get_key(path)] = path
+
+    # E-prints already extracted are skipped, without looking for their PDF
+    corpus = TextCorpus(args.corpus_path)
+    requested = len(paths)
+    paths = {key: path for key, path in paths.items() if key not in corpus}
+
+    # Find the PDF before the pool, missing ones are only reported
+    manifest = ArXivManifest(paths.values())
+    resolved = {}
+    missing = 0
+    for path in paths.values():
+        pdf_path = manifest.resolve(path)
+        if pdf_path is None:
+            missing += 1
+        else:
+            resolved[OpinionCache.get_key(pdf_path)] = pdf_path
+
+    # Their fallback version may be already extracted too
+    tasks = [(key, path) for key, path in resolved.items() if key not in corpus]
+    print('Corpus : {} e-prints already extracted, {} to extract, {} missing'.format(
+        requested - len(paths) + len(resolved) - len(tasks), len(tasks), missing))
+
+    errors = 0
+    with Pool(len(os.sched_getaffinity(0)),
+              maxtasksperchild=args.max_tasks) as pool:
+        for i, res in enumerate(pool.imap_unordered(extract_document, tasks)):
+            if res['pages'] is None:
+                errors += 1
+            else:
+                corpus.add(res['key'], res['pages'])
+            print('Get ' + str(i))
+    corpus.close()
+    print(errors)
@@ -2,9 +2,13 @@
 import argparse
 from pathlib import PurePath, Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 
 from src.query_making.query_arxiv_cat import QueryArXivCat
+from src.query_making.cyber_filter import format_query, write_cyber_subset
+from src.query_making.eprint_store import EPrintStore
+from src.query_making.bulk_metadata import BulkMetadata
 
 if __name__ == '__main__' :
     # Get command line args
@@ -20,42 +24,130 @@ if __name__ == '__main__' :
                         action='store',
                         help='path to the file containing the list of categories',
                         default=PurePath('data').joinpath('crtc_info.csv'))
+    parser.add_argument('--date',
+                        dest='date',
+                        action='store',
+                        help=('date of the snapshot folders (YYYY_MM_DD), use '
+                              'the date of an interrupted run to resume it'),
+                        default=datetime.now().strftime('%Y_%m_%d'))
+    parser.add_argument('--since',
+                        dest='since',
+                        action='store',
+                        help=('date of a previous snapshot (YYYY_MM_DD), only '
+                              'e-prints submitted after it are retrieved and '
+                              'merged with it into the new snapshot'),
+                        default=None)
+    parser.add_argument('--local_cyber',
+                        dest='local_cyber',
+                        action='store_true',
+                        help=('retrieve titles and abstracts with all e-prints '
+                              'and find security considerations locally, '
+                              'instead of a second harvest of each category'))
+    parser.add_argument('--store',
+                        dest='store_path',
+                        action='store',
+                        help=('path to a SQLite e-prints store shared by all '
+                              'categories, the .csv files become views of it'),
+                        default=None)
+    parser.add_argument('--api_url',
+                        dest='api_url',
+                        action='store',
+                        help='URL of the arXiv API (ex: a local stub server)',
+                        default=None)
+    parser.add_argument('--jobs',
+                        dest='jobs',
+                        action='store',
+                        type=int,
+                        help=('number of categories retrieved at the same time, '
+                              'all of them share the rate limit of the API'),
+                        default=1)
+    parser.add_argument('--bulk',
+                        dest='bulk_path',
+                        action='store',
+                        help=('path to a local arXiv metadata snapshot (Kaggle '
+                              'JSON lines, .json or .json.gz) used instead of '
+                              'the arXiv API'),
+                        default=None)
     args = parser.parse_args()
 
     # Creation of folders
-    cur_time = datetime.now().strftime('%Y_%m_%d')
+    cur_time = args.date
 
     # Cleaning path for Windows compatibility
     e_prints_path = PurePath(args.output).joinpath('query_e-prints_' + cur_time)
     cyber_e_prints_path = PurePath(args.output).joinpath('cyber_e_prints_' + cur_time)
     args.categories_path = PurePath(args.categories_path)
 
+    # Previous snapshot for a delta harvest
+    if args.since is None:
+        prev_e_prints_path = None
+        prev_cyber_e_prints_path = None
+    else:
+        prev_e_prints_path = PurePath(args.output).joinpath('query_e-prints_' + args.since)
+        prev_cyber_e_prints_path = PurePath(args.output).joinpath('cyber_e_prints_' + args.since)
+
     # mkdir
     Path(e_prints_path).mkdir(parents=True, exist_ok=True)
     Path(cyber_e_prints_path).mkdir(parents=True, exist_ok=True)
 
     # Format queries
-    query_formater = lambda key: 'ti:' + key + ' OR abs:' + key
-    cyber_keywords = '%28' + query_formater('secur*') + ' OR ' \
-                           + query_formater('safe*') + ' OR ' \
-                           + query_formater('reliability') + ' OR ' \
-                           + query_formater('dependability') + ' OR ' \
-                           + query_formater('confidentiality') + ' OR ' \
-                           + query_formater('integrity') + ' OR ' \
-                           + query_formater('availability') + ' OR ' \
-                           + query_formater('defen*') + ' OR ' \
-                           + query_formater('priva*') + '%29'
+    cyber_keywords = format_query()
+
+    # Shared e-prints store
+    store = None if args.store_path is None else EPrintStore(args.store_path)
 
     # Open the list of categories
     categories = pd.read_csv(args.categories_path,
                              sep=';',
                              dtype='string')['CRTC']
 
-    for category in categories.values:
+    # All e-prints of all categories, read in one pass from the snapshot
+    if args.bulk_path is not None:
+        BulkMetadata(PurePath(args.bulk_path),
+                     e_prints_path,
+                     categories.values).processing()
+        # Titles and abstracts are in the snapshot
+        args.local_cyber = True
+
+    def harvest(category):
+        """Retrieves all e-prints of a category, and its e-prints with
+        security considerations."""
         # All e-prints in a category
-        query = QueryArXivCat(e_prints_path, category)
-        query.processing()
+        if args.bulk_path is None:
+            query = QueryArXivCat(e_prints_path, category,
+                                  since=prev_e_prints_path,
+                                  abstracts=args.local_cyber,
+                                  url=args.api_url)
+            query.processing()
 
         # Only e-prints with security considerations in a category
-        query = QueryArXivCat(cyber_e_prints_path, category, cyber_keywords)
-        query.processing()
+        if args.local_cyber:
+            write_cyber_subset(
+                e_prints_path.joinpath(category + '.csv'),
+                cyber_e_prints_path.joinpath(category + '_cyber.csv'),
+                None if prev_cyber_e_prints_path is None
+                else prev_cyber_e_prints_path.joinpath(category + '_cyber.csv'))
+        else:
+            query = QueryArXivCat(cyber_e_prints_path, category, cyber_keywords,
+                                  since=prev_cyber_e_prints_path,
+                                  url=args.api_url)
+            query.processing()
+        return category
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        harvests = [executor.submit(harvest, category)
+                    for category in categories.values]
+        for harvested in as_completed(harvests):
+            category = harvested.result()
+
+            # Store e-prints once, the .csv files are regenerated from the store
+            if store is not None:
+                e_prints_file = e_prints_path.joinpath(category + '.csv')
+                cyber_file = cyber_e_prints_path.joinpath(category + '_cyber.csv')
+                store.add_category(category, e_prints_file)
+                store.add_category(category, cyber_file, cyber=True)
+                store.export_category(category, e_prints_file)
+                store.export_category(category, cyber_file, cyber=True)
+
+    if store is not None:
+        store.close()
@@ -8,7 +8,8 @@ import os
 from pathlib import PurePath, Path
 import pandas as pd
 
-from src.processing.opinion import OpinionProcessing
+from src.processing.opinion import OpinionProcessing, processing_pool
+from src.query_making.eprint_store import EPrintStore
 
 if __name__ == '__main__' :
     # Get command line args
@@ -29,6 +30,67 @@ if __name__ == '__main__' :
                         action='store',
                         help='path to the output folder',
                         default=PurePath('result'))
+    parser.add_argument('--store',
+                        dest='store_path',
+                        action='store',
+                        help=('path to the SQLite e-prints store, each e-print '
+                              'is then scored once for all its categories'),
+                        default=None)
+    parser.add_argument('--cache',
+                        dest='cache_path',
+                        action='store',
+                        help=('path to the opinion cache, shared by all '
+                              'snapshots, e-prints already scored are skipped'),
+                        default=None)
+    parser.add_argument('--timeout',
+                        dest='timeout',
+                        action='store',
+                        type=float,
+                        help=('time max to process an e-print (in seconds), '
+                              'it is then saved with the error -6 into '
+                              '<CRTC>.errors'),
+                        default=300.)
+    parser.add_argument('--memory',
+                        dest='memory',
+                        action='store',
+                        type=int,
+                        help=('resident memory max of a worker process (in '
+                              'MB), an e-print which needs more is saved with '
+                              'the error -7 into <CRTC>.errors'),
+                        default=None)
+    parser.add_argument('--maxtasks',
+                        dest='max_tasks',
+                        action='store',
+                        type=int,
+                        help='number of e-prints processed by a worker before it is replaced',
+                        default=1000)
+    parser.add_argument('--pages',
+                        dest='max_pages',
+                        action='store',
+                        type=int,
+                        help='number max of pages scored by e-print',
+                        default=None)
+    parser.add_argument('--references',
+                        dest='stop_at_references',
+                        action='store_true',
+                        help='does not score the references section and the following pages')
+    parser.add_argument('--memo',
+                        dest='memo_path',
+                        action='store',
+                        help=('path to the memo of lemmas, saved by the worker '
+                              'processes and loaded by the next ones'),
+                        default=None)
+    parser.add_argument('--nltk_data',
+                        dest='data_path',
+                        action='store',
+                        help='path to the NLTK data folder made by provision_nltk.py',
+                        default=PurePath('data').joinpath('nltk_data'))
+    parser.add_argument('--corpus',
+                        dest='corpus_path',
+                        action='store',
+                        help=('path to the text corpus made by extract_text.py, '
+                              'e-prints found into it are not read from their PDF'),
+                        default=None)
     args = parser.parse_args()
 
     # Cleaning path for Windows compatibility
@@ -36,17 +98,47 @@ if __name__ == '__main__' :
     args.eprints_path = PurePath(args.eprints_path)
     args.output = PurePath(args.output)
 
+    # Limits of the worker processes and pages scored
+    memory = None if args.memory is None else args.memory * 1024 * 1024
+    options = {'document_timeout': args.timeout,
+               'memory': memory,
+               'max_tasks': args.max_tasks,
+               'max_pages': args.max_pages,
+               'stop_at_references': args.stop_at_references,
+               'memo_path': args.memo_path,
+               'data_path': args.data_path,
+               'corpus_path': args.corpus_path}
+
     # mkdir
     Path(args.output).mkdir(parents=True, exist_ok=True)
 
-    # Get list of all files sorted
-    queries_files = sorted(os.listdir(args.eprints_path))
+    # Get list of all files sorted (without the harvest progress markers)
+    queries_files = sorted(file for file in os.listdir(args.eprints_path)
+                           if file.endswith('.csv'))
 
     def url_to_arxiv_folder(path: str, arxiv_path: PurePath):
         """Modify URL into path"""
         return arxiv_path.joinpath(path)
 
+    if args.store_path is not None:
+        # Score each e-print of the store once, whatever its categories
+        store = EPrintStore(args.store_path)
+        serie_path = store.unscored_paths().apply(url_to_arxiv_folder,
+                                                  args=[args.arxiv_path])
+        sentiAnalysis = OpinionProcessing(serie_path, args.output, 'store',
+                                          args.cache_path)
+        sentiAnalysis.processing(len(os.sched_getaffinity(0)), **options)
+
+        # Opinions go back into the store, then per-category files are exported
+        store.load_opinions(args.output.joinpath('store.csv'))
+        for category in store.categories():
+            store.export_opinion(category,
+                                 args.output.joinpath(category[3:3 + 2] + '.csv'))
+        store.close()
+        queries_files = []
+
     # For each files
+    processings = []
     for query in queries_files :
         # Get crtc name
         crtc_name = query[3:3 + 2]
@@ -56,7 +148,12 @@ if __name__ == '__main__' :
         df['arxiv_path'] = df['arxiv_path'].apply(url_to_arxiv_folder,
                                                   args=[args.arxiv_path])
         # Init the opinion analysis
-        sentiAnalysis = OpinionProcessing(df['arxiv_path'],
-                                          args.output, crtc_name)
-        # Processing
-        sentiAnalysis.processing(len(os.sched_getaffinity(0)))
+        processings.append(OpinionProcessing(df['arxiv_path'],
+                                             args.output, crtc_name,
+                                             args.cache_path))
+    # Processing, with one pool for all categories
+    if len(processings) > 0:
+        processing_pool(processings,
+                        len(os.sched_getaffinity(0)),
+                        args.cache_path,
+                        **options)
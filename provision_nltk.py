@@ -0,0 +1,25 @@
+"""Downloads the NLTK resources used to compute the opinion of e-prints into a
+local folder and compiles the opinion lexicon. It is the only step which
+needs the network, processing_queries.py then uses this folder offline."""
+import argparse
+from pathlib import PurePath, Path
+
+from src.NLP_tools.resources import provision
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description=('Downloads the NLTK resources '
+                                     'and compiles the opinion lexicon.'))
+    parser.add_argument('--nltk_data',
+                        dest='data_path',
+                        action='store',
+                        help='path to the NLTK data folder',
+                        default=PurePath('data').joinpath('nltk_data'))
+    args = parser.parse_args()
+
+    # Cleaning path for Windows compatibility
+    args.data_path = PurePath(args.data_path)
+
+    # mkdir
+    Path(args.data_path).mkdir(parents=True, exist_ok=True)
+
+    provision(args.data_path)
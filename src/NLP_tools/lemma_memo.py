@@ -0,0 +1,74 @@
+"""LemmaMemo class definition, a bounded memo of the lemmas of tokens. The
+vocabulary of e-prints is very repetitive, so most lemmatizations are
+already done."""
+
+import os
+import pickle
+from collections import OrderedDict
+
+class LemmaMemo:
+    """Least recently used memo of token -> lemma, with hit and miss
+    counters. It can be saved and loaded to start warm.
+
+    :param lemmatize: function returning the lemma of a token.
+    :type lemmatize: callable
+
+    :param maxsize: number max of memoized lemmas.
+    :type maxsize: int"""
+    def __init__(self, lemmatize, maxsize=100000):
+        #: Function returning the lemma of a token
+        self.lemmatize = lemmatize
+        #: Number max of memoized lemmas
+        self.maxsize = maxsize
+        #: Memoized lemmas, from the least to the most recently used
+        self.memo = OrderedDict()
+        #: Number of lemmas found in the memo
+        self.hits = 0
+        #: Number of lemmas computed
+        self.misses = 0
+
+    def __call__(self, token) -> str:
+        """Returns the lemma of `token`.
+
+        :param token: cleaned token.
+        :type token: str"""
+        lemma = self.memo.get(token)
+        if lemma is not None:
+            self.hits += 1
+            self.memo.move_to_end(token)
+            return lemma
+
+        self.misses += 1
+        lemma = self.lemmatize(token)
+        self.memo[token] = lemma
+        if len(self.memo) > self.maxsize:
+            self.memo.popitem(last=False)
+        return lemma
+
+    def hit_rate(self) -> float:
+        """Returns the rate of lemmas found in the memo."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls > 0 else 0.
+
+    def load(self, path) -> None:
+        """Adds the lemmas saved by :meth:`save` into the memo.
+
+        :param path: path to the saved memo.
+        :type path: :class:`pathlib.PurePath`"""
+        with open(path, 'rb') as memo_file:
+            items = pickle.load(memo_file)
+        for token, lemma in items[-self.maxsize:]:
+            self.memo[token] = lemma
+        while len(self.memo) > self.maxsize:
+            self.memo.popitem(last=False)
+
+    def save(self, path) -> None:
+        """Saves the memo. The file is replaced atomically, so processes can
+        save the same memo concurrently.
+
+        :param path: path to the saved memo.
+        :type path: :class:`pathlib.PurePath`"""
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as memo_file:
+            pickle.dump(list(self.memo.items()), memo_file)
+        os.replace(tmp_path, path)
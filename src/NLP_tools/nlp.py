@@ -0,0 +1,117 @@
+"""NLP class definition, contains tools to clean a text and to compute its
+opinion with the opinion lexicon of Bing Liu and collaborators
+(https://www.cs.uic.edu/~liub/FBS/opinion-analysis.html)."""
+
+import os
+import re
+from nltk.stem import WordNetLemmatizer
+
+from .lemma_memo import LemmaMemo
+from .resources import load_lexicon, lexicon_digest
+
+#: Title of the references section, alone on its line (can be numbered)
+REFERENCES = re.compile(r'^[ \t]*(?:[0-9]+\.?[ \t]*)?(?:references|bibliography)[ \t]*$',
+                        re.IGNORECASE | re.MULTILINE)
+
+def references_start(text):
+    """Returns the position of the title of the references section in
+    `text`, or None.
+
+    :param text: text of a page.
+    :type text: str"""
+    match = REFERENCES.search(text)
+    return None if match is None else match.start()
+
+def text_cleaner(input_text):
+    """Clean, stemmatize and tokenize the input_text.
+
+    :param input_text: input text to be processed.
+    :type input_text: str"""
+    # Lower case words, without digits and punctuation
+    return re.sub(r'[^a-z]+', ' ', input_text.lower()).split()
+
+class NLP:
+    """Contain tools for NLP tasks.
+
+    :param memo_size: number max of lemmas memoized by :attr:`lemmatize`.
+    :type memo_size: int
+
+    :param memo_path: path to a memo of lemmas saved by a previous run, loaded
+        if it exists.
+    :type memo_path: :class:`pathlib.PurePath`
+
+    :param data_path: path to the local NLTK data folder (see
+        :func:`.resources.provision`), None to use the NLTK default folders.
+    :type data_path: :class:`pathlib.PurePath`"""
+
+    #: Version of the cleaning, to change with it (it invalidates the cached
+    #: opinions). The lexicon is versioned by its digest, see :meth:`get_version`
+    VERSION = '1'
+
+    def __init__(self, memo_size=100000, memo_path=None, data_path=None):
+        positive_words, negative_words, stop_words = load_lexicon(data_path)
+        #: Positive words of the opinion lexicon
+        self.positive_words = positive_words
+        #: Negative words of the opinion lexicon
+        self.negative_words = negative_words
+        #: Common english words
+        self.stop_words = stop_words
+        #: Wordnet lemmatizer, to get the base word
+        self.lemmatizer = WordNetLemmatizer()
+        #: Memoized lemmatization
+        self.lemmatize = LemmaMemo(self.lemmatizer.lemmatize, memo_size)
+        if memo_path is not None and os.path.exists(memo_path):
+            self.lemmatize.load(memo_path)
+
+    @classmethod
+    def get_version(cls, data_path=None) -> str:
+        """Returns the version of the NLP tools: :attr:`VERSION` and the
+        digest of the lexicon loaded from `data_path`.
+
+        :param data_path: path to the local NLTK data folder, None to use the
+            NLTK default folders.
+        :type data_path: :class:`pathlib.PurePath`"""
+        return '{};lexicon={}'.format(cls.VERSION, lexicon_digest(data_path))
+
+    def cleaning(self, text) -> list:
+        """Clean and tokenize a text.
+
+        :param text: text to be tokenized and cleaned.
+        :type text: str"""
+        return [self.lemmatize(token)
+                for token in text_cleaner(text)
+                if len(token) > 1 and token not in self.stop_words]
+
+    def counts(self, cleaned_tokens_list):
+        """Returns the number of positive words, of negative words and of
+        words of a token list. Counts of several parts of a text can be summed
+        and given to :meth:`opinion_of_counts`.
+
+        :param cleaned_tokens_list: List of cleaned tokenized words.
+        :type cleaned_tokens_list: list[str]"""
+        positive = sum(token in self.positive_words for token in cleaned_tokens_list)
+        negative = sum(token in self.negative_words for token in cleaned_tokens_list)
+        return positive, negative, len(cleaned_tokens_list)
+
+    @staticmethod
+    def opinion_of_counts(positive, negative, total) -> float:
+        """Compute the opinion from the counts of :meth:`counts`.
+
+        :param positive: number of positive words.
+        :type positive: int
+
+        :param negative: number of negative words.
+        :type negative: int
+
+        :param total: number of words.
+        :type total: int"""
+        if total == 0:
+            return 0.
+        return (positive - negative) / total
+
+    def opinion(self, cleaned_tokens_list) -> float:
+        """Compute the opinion of a token list.
+
+        :param cleaned_tokens_list: List of cleaned tokenized words.
+        :type cleaned_tokens_list: list[str]"""
+        return self.opinion_of_counts(*self.counts(cleaned_tokens_list))
@@ -0,0 +1,102 @@
+"""NLTK resources used by :class:`.nlp.NLP`. They are downloaded once into a
+local data folder (see ``provision_nltk.py``), and the opinion lexicon and
+the stopwords are compiled into a single pickle file, fast to load and which
+needs no network."""
+
+import os
+import pickle
+import hashlib
+import functools
+import nltk
+from nltk.corpus import opinion_lexicon, stopwords, wordnet
+
+#: NLTK resources used by the NLP tools: the opinion lexicon (from Bing Liu
+#: and collaborators, https://www.cs.uic.edu/~liub/FBS/opinion-analysis.html),
+#: the common english words and Wordnet, a lexical database for the English
+#: language that helps the script determine the base word
+RESOURCES = ['opinion_lexicon', 'stopwords', 'wordnet']
+
+#: Name of the compiled lexicon in the data folder
+LEXICON_FILE = 'lexicon.pickle'
+
+def add_data_path(data_path) -> None:
+    """Makes NLTK search its resources into `data_path` first.
+
+    :param data_path: path to the local NLTK data folder.
+    :type data_path: :class:`pathlib.PurePath`"""
+    if str(data_path) not in nltk.data.path:
+        nltk.data.path.insert(0, str(data_path))
+
+def provision(data_path) -> None:
+    """Downloads the NLTK resources into `data_path` and compiles the lexicon.
+    It is the only step which needs the network.
+
+    :param data_path: path to the local NLTK data folder.
+    :type data_path: :class:`pathlib.PurePath`"""
+    for resource in RESOURCES:
+        if not nltk.download(resource, download_dir=str(data_path)):
+            raise RuntimeError('Error, {} not downloaded'.format(resource))
+    add_data_path(data_path)
+    compile_lexicon(data_path)
+
+def compile_lexicon(data_path) -> None:
+    """Writes the positive words, the negative words and the stopwords into
+    the compiled lexicon of `data_path`.
+
+    :param data_path: path to the local NLTK data folder.
+    :type data_path: :class:`pathlib.PurePath`"""
+    lexicon = {'positive': frozenset(opinion_lexicon.positive()),
+               'negative': frozenset(opinion_lexicon.negative()),
+               'stopwords': frozenset(stopwords.words('english'))}
+
+    lexicon_path = os.path.join(data_path, LEXICON_FILE)
+    with open(lexicon_path + '.tmp', 'wb') as lexicon_file:
+        pickle.dump(lexicon, lexicon_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(lexicon_path + '.tmp', lexicon_path)
+
+@functools.lru_cache(maxsize=None)
+def load_lexicon(data_path=None):
+    """Returns the positive words, the negative words and the stopwords, from
+    the compiled lexicon of `data_path` if it exists, else from the NLTK
+    corpora. The lexicon is loaded once per process.
+
+    :param data_path: path to the local NLTK data folder, None to use the
+        NLTK default folders.
+    :type data_path: :class:`pathlib.PurePath`"""
+    if data_path is not None:
+        add_data_path(data_path)
+        lexicon_path = os.path.join(data_path, LEXICON_FILE)
+        if os.path.exists(lexicon_path):
+            with open(lexicon_path, 'rb') as lexicon_file:
+                lexicon = pickle.load(lexicon_file)
+            return lexicon['positive'], lexicon['negative'], lexicon['stopwords']
+    return (frozenset(opinion_lexicon.positive()),
+            frozenset(opinion_lexicon.negative()),
+            frozenset(stopwords.words('english')))
+
+@functools.lru_cache(maxsize=None)
+def lexicon_digest(data_path=None) -> str:
+    """Returns a short digest of the words returned by :func:`load_lexicon`,
+    it changes with any word added or removed (e.g. by a new release of the
+    NLTK corpora).
+
+    :param data_path: path to the local NLTK data folder, None to use the
+        NLTK default folders.
+    :type data_path: :class:`pathlib.PurePath`"""
+    digest = hashlib.sha1()
+    for words in load_lexicon(data_path):
+        digest.update('\n'.join(sorted(words)).encode('utf-8'))
+        # Separates the lists, a word moved from one to another changes the digest
+        digest.update(b'\0')
+    return digest.hexdigest()[:12]
+
+def load_resources(data_path=None) -> None:
+    """Loads the lexicon and Wordnet in the current process. Processes forked
+    after share them, so they don't load them again.
+
+    :param data_path: path to the local NLTK data folder, None to use the
+        NLTK default folders.
+    :type data_path: :class:`pathlib.PurePath`"""
+    load_lexicon(data_path)
+    # Wordnet is read on its first use
+    wordnet.get_version()
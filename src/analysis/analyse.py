@@ -3,6 +3,8 @@ import urllib.request
 import pandas as pd
 from pandas.tseries.offsets import MonthEnd
 
+from .dataset import read_dataset
+
 class Analyse:
     """The Analyse class process .csv files inclued into dataset_path and
     process it.
@@ -16,65 +18,127 @@ class Analyse:
     :param freq: The frequency of result output. Authorized value : 'M' for a
         monthly frequency or 'Y' for an annual frequency.
     :type freq: str
-    :param dataset_path: The input folder path containing all .csv files.
-    :type dataset_path: str
+    :param dataset_path: The input dataset file (.parquet or .csv), or the
+        dataset of a category read from a
+        :class:`src.analysis.dataset_store.DatasetStore`.
+    :type dataset_path: str or :class:`pandas.DataFrame`
     """
     def __init__(self, start_date, end_date, freq, dataset_path):
+        #: Derived series already computed, by name
+        self.__cache = {}
+
         # Parameters of the analysis
         # Period to analyse
-        #: Starting date.
-        self.S_DATE = pd.to_datetime(start_date, utc=True)
-        #: Ending date.
-        self.E_DATE = pd.to_datetime(end_date, utc=True)
-
-        # Grouper use to group by frequency on the published column
-        if freq not in ['M', 'Y']:
-            raise TypeError('freq must be M or Y')
-        self.__gp = pd.Grouper(key='published', freq=freq)
-        self.__freq = freq
+        self.__s_date = pd.to_datetime(start_date, utc=True)
+        self.__e_date = pd.to_datetime(end_date, utc=True)
+        self.freq = freq
 
         ##################################
         # Inputs
         ##################################
         #: Raw ``pandas.DataFrame`` dataset.
-        self.dataset_raw = pd.read_csv(dataset_path,
-                                       index_col=0,
-                                       dtype={
-                                           'id': 'str',
-                                           'version': 'str',
-                                           'primary_category': 'str',
-                                           'arxiv_path': 'str',
-                                           'http_link': 'str',
-                                           'cyber': 'bool',
-                                           'opinion': 'float'
-                                       },
-                                       parse_dates=[
-                                           'published',
-                                           'updated',
-                                       ])
-        self.dataset_raw.drop(['arxiv_path', 'http_link'], axis=1, inplace=True)
+        if isinstance(dataset_path, pd.DataFrame):
+            # Already typed, read from a store
+            self.dataset_raw = dataset_path
+        elif str(dataset_path).endswith('.parquet'):
+            # Typed columns, only the used ones are read
+            self.dataset_raw = read_dataset(dataset_path)
+        else:
+            self.dataset_raw = pd.read_csv(dataset_path,
+                                           index_col=0,
+                                           dtype={
+                                               'id': 'str',
+                                               'version': 'str',
+                                               'primary_category': 'str',
+                                               'arxiv_path': 'str',
+                                               'http_link': 'str',
+                                               'cyber': 'bool',
+                                               'opinion': 'float'
+                                           },
+                                           parse_dates=[
+                                               'published',
+                                               'updated',
+                                           ])
+            self.dataset_raw.drop(['arxiv_path', 'http_link'], axis=1, inplace=True)
 
         # Cleaning Input for the analyse period
-        #: Clean ``pandas.DataFrame`` dataset (in the current period).
-        self.dataset_clean = self.cleaning_period(self.dataset_raw, 'published')
+        self.__update_period()
 
         # Init the normalization
         self.__init_normalization()
 
+    @property
+    def S_DATE(self):
+        """Starting date, setting it cleans again the dataset."""
+        return self.__s_date
+
+    @S_DATE.setter
+    def S_DATE(self, start_date):
+        self.__s_date = pd.to_datetime(start_date, utc=True)
+        self.__update_period()
+
+    @property
+    def E_DATE(self):
+        """Ending date, setting it cleans again the dataset."""
+        return self.__e_date
+
+    @E_DATE.setter
+    def E_DATE(self, end_date):
+        self.__e_date = pd.to_datetime(end_date, utc=True)
+        self.__update_period()
+
+    @property
+    def freq(self):
+        """Frequency of result output ('M' or 'Y')."""
+        return self.__freq
+
+    @freq.setter
+    def freq(self, freq):
+        if freq not in ['M', 'Y']:
+            raise TypeError('freq must be M or Y')
+        # Grouper use to group by frequency on the published column
+        self.__gp = pd.Grouper(key='published', freq=freq)
+        self.__freq = freq
+        self.__cache.clear()
+
+    def __update_period(self) -> None:
+        """Cleans the dataset for the current period and forgets the derived
+        series of the previous one."""
+        #: Clean ``pandas.DataFrame`` dataset (in the current period).
+        self.dataset_clean = self.cleaning_period(self.dataset_raw, 'published')
+        self.__cache.clear()
+
+    def __cached(self, name, compute) -> pd.DataFrame:
+        """Returns a copy of the derived series `name`, computed once by
+        `compute` for the current period and frequency. Callers can modify
+        the copy without changing the cached series.
+
+        :param name: name of the derived series.
+        :type name: str
+
+        :param compute: function computing the series.
+        :type compute: callable"""
+        if name not in self.__cache:
+            self.__cache[name] = compute()
+        return self.__cache[name].copy()
+
     def cleaning_period(self, df: pd.DataFrame, col_name) -> pd.DataFrame:
         """Remove data which is not in the interval"""
         # Mask construction
         mask = df[col_name] < self.S_DATE
         mask = mask | (df[col_name] >= self.E_DATE)
         # Check if there is something to do, to avoid an error
-        if True in mask :
+        if mask.any():
             # Cleaning DataFrame
             df = df.drop(df[mask].index)
             return df
         return df
 
     def get_eprints_count(self) -> pd.DataFrame:
-        """"""
+        """Number of e-prints by period."""
+        return self.__cached('eprints_count', self.__eprints_count)
+
+    def __eprints_count(self) -> pd.DataFrame:
         df = self.dataset_clean.groupby(self.__gp).count()
         return df.drop(['updated',
                         'version',
@@ -85,7 +149,10 @@ class Analyse:
                        axis=1)
 
     def get_cyber_eprints_count(self) -> pd.DataFrame:
-        """"""
+        """Number of cyber e-prints by period."""
+        return self.__cached('cyber_eprints_count', self.__cyber_eprints_count)
+
+    def __cyber_eprints_count(self) -> pd.DataFrame:
         df = self.dataset_clean[self.dataset_clean['cyber'] == True]
         df = df.groupby(self.__gp).count()
         return df.drop(['updated',
@@ -97,18 +164,28 @@ class Analyse:
                        axis=1)
 
     def get_eprints_count_norm(self) -> pd.DataFrame:
-        """"""
+        """Number of e-prints by period, normalized by the arXiv submissions."""
+        return self.__cached('eprints_count_norm', self.__eprints_count_norm)
+
+    def __eprints_count_norm(self) -> pd.DataFrame:
         df = self.get_eprints_count()
         df['id'] = df['id'] / self.arxiv_stats['submissions']
         return df
 
     def get_cyber_eprints_count_norm(self) -> pd.DataFrame:
-        """"""
+        """Number of cyber e-prints by period, normalized by the arXiv submissions."""
+        return self.__cached('cyber_eprints_count_norm', self.__cyber_eprints_count_norm)
+
+    def __cyber_eprints_count_norm(self) -> pd.DataFrame:
         df = self.get_cyber_eprints_count()
         df['id'] = df['id'] / self.arxiv_stats['submissions']
         return df
 
     def get_opinion_quantiles(self) -> pd.DataFrame:
+        """Quartiles of the opinions by period."""
+        return self.__cached('opinion_quantiles', self.__opinion_quantiles)
+
+    def __opinion_quantiles(self) -> pd.DataFrame:
         df = self.dataset_clean.drop(['updated',
                     'version',
                     'primary_category',
@@ -123,6 +200,10 @@ class Analyse:
         return pd.DataFrame(quantiles)
 
     def get_cyber_opinion_quantiles(self) -> pd.DataFrame:
+        """Quartiles of the opinions of cyber e-prints by period."""
+        return self.__cached('cyber_opinion_quantiles', self.__cyber_opinion_quantiles)
+
+    def __cyber_opinion_quantiles(self) -> pd.DataFrame:
         df = self.dataset_clean[self.dataset_clean['cyber'] == True]
         df = df.drop(['updated',
                       'version',
@@ -0,0 +1,126 @@
+"""Typed columnar dataset, written by dataset_construction.py into Parquet
+files and read by :class:`.analyse.Analyse`."""
+
+import os
+import pandas as pd
+
+from ..query_making.query_arxiv_cat import QueryArXivCat
+
+#: Columns of the dataset used by the analysis
+ANALYSIS_COLUMNS = ['id',
+                    'published',
+                    'updated',
+                    'version',
+                    'primary_category',
+                    'all_categories',
+                    'cyber',
+                    'opinion']
+
+#: Columns of the e-prints files kept in the dataset (titles and abstracts
+#: are only used to find security considerations)
+E_PRINTS_COLUMNS = ['id',
+                    'published',
+                    'updated',
+                    'version',
+                    'primary_category',
+                    'all_categories',
+                    'arxiv_path',
+                    'http_link']
+
+def category_files(e_prints_path, cyber_e_prints_path, opinion_path) -> dict:
+    """Matches the files of the three folders by CRTC code ('cs.AR.csv',
+    'cs.AR_cyber.csv' and 'AR.csv'). Returns, for each category of
+    `e_prints_path`, the paths to its three files. Categories without cyber
+    e-prints or opinions are skipped.
+
+    :param e_prints_path: folder of the e-prints files.
+    :type e_prints_path: :class:`pathlib.PurePath`
+
+    :param cyber_e_prints_path: folder of the cyber e-prints files.
+    :type cyber_e_prints_path: :class:`pathlib.PurePath`
+
+    :param opinion_path: folder of the opinion files.
+    :type opinion_path: :class:`pathlib.PurePath`"""
+    # Only .csv files (no harvest progress markers, no .part or .errors files)
+    list_csv = lambda path: {file[:-len('.csv')] for file in os.listdir(path)
+                             if file.endswith('.csv')}
+    cyber_files = list_csv(cyber_e_prints_path)
+    opinion_files = list_csv(opinion_path)
+
+    files = {}
+    for category in sorted(list_csv(e_prints_path)):
+        crtc = category[len('cs.'):]
+        if category + '_cyber' not in cyber_files or crtc not in opinion_files:
+            print('Category : {}; No cyber e-prints or opinions, skipped'.format(category))
+            continue
+        files[category] = (e_prints_path.joinpath(category + '.csv'),
+                           cyber_e_prints_path.joinpath(category + '_cyber.csv'),
+                           opinion_path.joinpath(crtc + '.csv'))
+    return files
+
+def merge_category(e_prints_file, cyber_e_prints_file, opinion_file) -> pd.DataFrame:
+    """Merges the files of a category into its dataset, indexed by the row of
+    the e-prints file (the index used by
+    :class:`src.processing.opinion.OpinionProcessing`). The 'cyber' column is
+    True for e-prints of the cyber file, matched by key (see
+    :meth:`src.query_making.query_arxiv_cat.QueryArXivCat.get_keys`), and
+    'opinion' is joined on the row index (NaN for e-prints not scored).
+
+    :param e_prints_file: path to the e-prints file.
+    :type e_prints_file: :class:`pathlib.PurePath`
+
+    :param cyber_e_prints_file: path to the cyber e-prints file.
+    :type cyber_e_prints_file: :class:`pathlib.PurePath`
+
+    :param opinion_file: path to the opinion file.
+    :type opinion_file: :class:`pathlib.PurePath`"""
+    # Indexed by row, as the e-prints scored by processing_queries.py
+    df = pd.read_csv(e_prints_file,
+                     usecols=E_PRINTS_COLUMNS,
+                     dtype='str')
+    df_cyber = pd.read_csv(cyber_e_prints_file,
+                           usecols=['id', 'arxiv_path'],
+                           dtype='str')
+    # Opinions are kept as written, they are converted by :func:`to_typed`
+    df_opinion = pd.read_csv(opinion_file,
+                             index_col=0,
+                             dtype={'opinion': 'str'})
+
+    df['cyber'] = QueryArXivCat.get_keys(df).isin(QueryArXivCat.get_keys(df_cyber))
+    return df.join(df_opinion['opinion'])
+
+def to_typed(df) -> pd.DataFrame:
+    """Converts the columns of a merged dataset read as strings: dates into
+    datetime64 (UTC), 'primary_category' into a category, 'all_categories'
+    into lists, 'cyber' into bool and 'opinion' into float32.
+
+    :param df: merged dataset.
+    :type df: :class:`pandas.DataFrame`"""
+    for column in ['published', 'updated']:
+        df[column] = pd.to_datetime(df[column], utc=True)
+    df['primary_category'] = df['primary_category'].astype('category')
+    # Written as "['cs.AR', 'cs.CR']"
+    df['all_categories'] = df['all_categories'].str.findall(r"'([^']*)'")
+    df['cyber'] = df['cyber'].astype(str) == 'True'
+    df['opinion'] = df['opinion'].astype('float32')
+    return df
+
+def write_dataset(df, path) -> None:
+    """Writes a typed dataset into a compressed Parquet file.
+
+    :param df: typed dataset (see :func:`to_typed`).
+    :type df: :class:`pandas.DataFrame`
+
+    :param path: path to the .parquet file.
+    :type path: :class:`pathlib.PurePath`"""
+    df.to_parquet(path, compression='zstd')
+
+def read_dataset(path, columns=ANALYSIS_COLUMNS) -> pd.DataFrame:
+    """Reads only `columns` of a Parquet dataset.
+
+    :param path: path to the .parquet file.
+    :type path: :class:`pathlib.PurePath`
+
+    :param columns: columns to read.
+    :type columns: [str]"""
+    return pd.read_parquet(path, columns=columns)
@@ -0,0 +1,91 @@
+"""DatasetStore class definition, a single store of the datasets of all
+categories: a Parquet file per category, partitioned as 'category=<name>'
+and sorted by submission date."""
+
+import os
+from pathlib import Path
+import pandas as pd
+
+from .dataset import ANALYSIS_COLUMNS, write_dataset
+
+class DatasetStore:
+    """This class writes and reads the typed datasets (see
+    :func:`.dataset.to_typed`) of several categories. A category is read
+    alone, or all categories are read in a single scan of the store.
+
+    :param path: Path to the folder of the store.
+    :type path: :class:`pathlib.PurePath`"""
+
+    #: Prefix of the partition folders
+    PARTITION = 'category='
+    #: Name of the file of a partition
+    FILE_NAME = 'part-0.parquet'
+
+    def __init__(self, path):
+        #: Path to the folder of the store
+        self.path = Path(path)
+
+    def categories(self) -> list:
+        """Returns the sorted categories of the store."""
+        if not self.path.exists():
+            return []
+        return sorted(folder[len(self.PARTITION):] for folder in os.listdir(self.path)
+                      if folder.startswith(self.PARTITION))
+
+    def write(self, category, df) -> None:
+        """Writes (or replaces) the dataset of a category, sorted by
+        submission date. The file is replaced atomically, so a reader sees
+        either the previous dataset or the new one.
+
+        :param category: arXiv category.
+        :type category: str
+
+        :param df: typed dataset of the category.
+        :type df: :class:`pandas.DataFrame`"""
+        partition = self.path.joinpath(self.PARTITION + category)
+        partition.mkdir(parents=True, exist_ok=True)
+
+        df = df.sort_values('published', kind='mergesort').reset_index(drop=True)
+        # Files starting with '.' are ignored by the readers of the store
+        tmp_path = partition.joinpath('.' + self.FILE_NAME + '.tmp')
+        write_dataset(df, tmp_path)
+        os.replace(tmp_path, partition.joinpath(self.FILE_NAME))
+
+    def query(self, category, start_date=None, end_date=None,
+              columns=ANALYSIS_COLUMNS) -> pd.DataFrame:
+        """Returns the e-prints of a category submitted between `start_date`
+        (included) and `end_date` (excluded), as expected by
+        :class:`.analyse.Analyse`.
+
+        :param category: arXiv category.
+        :type category: str
+
+        :param start_date: first date, all e-prints if None.
+        :type start_date: str
+
+        :param end_date: end date, all e-prints if None.
+        :type end_date: str
+
+        :param columns: columns to read.
+        :type columns: [str]"""
+        df = pd.read_parquet(self.path.joinpath(self.PARTITION + category,
+                                                self.FILE_NAME),
+                             columns=columns)
+        # Rows are sorted by date, the period is a slice
+        start = 0
+        end = len(df)
+        if start_date is not None:
+            start = df['published'].searchsorted(pd.to_datetime(start_date, utc=True))
+        if end_date is not None:
+            end = df['published'].searchsorted(pd.to_datetime(end_date, utc=True))
+        return df.iloc[start:end]
+
+    def scan(self, columns=ANALYSIS_COLUMNS) -> dict:
+        """Reads all categories in a single scan of the store and returns the
+        dataset of each category, as expected by :class:`.analyse.Analyse`.
+
+        :param columns: columns to read.
+        :type columns: [str]"""
+        df = pd.read_parquet(self.path, columns=columns + ['category'])
+        return {str(category): df_category.drop('category', axis=1)
+                for category, df_category in df.groupby('category', observed=True)}
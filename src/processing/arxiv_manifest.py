@@ -0,0 +1,54 @@
+"""ArXivManifest class definition, an index of the PDF of the local arXiv
+folder, so that each e-print is found with a lookup in memory instead of
+opening files which may not exist."""
+
+import os
+from pathlib import PurePath
+
+class ArXivManifest:
+    """Maps each e-print of the local arXiv folder to its available versions:
+    (folder, id) -> {version: path}. It is built in one pass, each folder
+    holding a requested e-print being listed once.
+
+    :param paths: paths of the requested e-prints
+        ('<arxiv>/<archive>/pdf/<yymm>/<id>v<version>.pdf').
+    :type paths: iterable of :class:`pathlib.PurePath`"""
+    def __init__(self, paths):
+        #: Available versions of the e-prints
+        self.versions = {}
+        for folder in sorted({PurePath(path).parent for path in paths}):
+            self.__scan(folder)
+
+    def __scan(self, folder) -> None:
+        """Adds the PDF of `folder` into the manifest."""
+        try:
+            entries = os.scandir(folder)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf'):
+                    paper_id, _, version = entry.name[:-len('.pdf')].rpartition('v')
+                    self.versions.setdefault((folder, paper_id), {})[version] = \
+                        folder.joinpath(entry.name)
+
+    @staticmethod
+    def first_version(path):
+        """Returns the path of the version 1 of an e-print, the fallback of
+        :meth:`resolve`.
+
+        :param path: path of the requested e-print.
+        :type path: :class:`pathlib.PurePath`"""
+        path = PurePath(path)
+        return path.with_name(path.stem.rpartition('v')[0] + 'v1.pdf')
+
+    def resolve(self, path):
+        """Returns the path of the PDF of an e-print: the requested version,
+        else its version 1 (as the previous fallback), else None.
+
+        :param path: path of the requested e-print.
+        :type path: :class:`pathlib.PurePath`"""
+        path = PurePath(path)
+        paper_id, _, version = path.stem.rpartition('v')
+        versions = self.versions.get((path.parent, paper_id), {})
+        return versions.get(version, versions.get('1'))
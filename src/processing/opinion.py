@@ -1,9 +1,121 @@
-from multiprocessing import Pool
-import nltk
+import os
+import re
+import time
+import itertools
+from multiprocessing.util import Finalize
 import pandas as pd
 import fitz
 
-from ..NLP_tools.nlp import NLP
+from ..NLP_tools.nlp import NLP, references_start
+from ..NLP_tools.lexicon_scorer import LexiconScorer
+from ..NLP_tools.resources import load_resources
+from ..query_making.csv_sink import CSVAppendSink
+from .opinion_cache import OpinionCache
+from .text_corpus import TextCorpus
+from .arxiv_manifest import ArXivManifest
+from . import supervised_pool
+from .supervised_pool import SupervisedPool
+
+#: NLP tools of the current process, loaded once by :func:`init_worker`
+nlp = None
+#: Lexicon scorer of the current process, built by :func:`init_worker`
+scorer = None
+#: Opinion cache of the current process (read only), opened by :func:`init_worker`
+cache = None
+#: Text of the e-prints already extracted, given to :func:`init_worker`
+corpus = None
+#: Number max of pages scored by e-print, None for no limit
+max_pages = None
+#: The references section and the following pages are not scored
+stop_at_references = False
+
+#: Opinion of an e-print which can't be processed
+ERROR = -5.
+#: Opinion of an e-print processed in more than the timeout
+ERROR_TIMEOUT = -6.
+#: Opinion of an e-print which needs more than the memory limit
+ERROR_MEMORY = -7.
+#: Opinion of an e-print missing from the arXiv folder
+ERROR_MISSING = -8.
+
+#: Opinion of an e-print whose worker was killed, by failure of the pool
+POOL_ERRORS = {supervised_pool.TIMEOUT: ERROR_TIMEOUT,
+               supervised_pool.MEMORY: ERROR_MEMORY,
+               supervised_pool.CRASH: ERROR}
+
+#: Messages of the allocation failures of MuPDF, raised as RuntimeError
+MUPDF_MEMORY_ERROR = re.compile(r'out of memory|(?:m|c|re)alloc|cannot allocate',
+                                re.IGNORECASE)
+
+def get_version(pages=None, references=False, data_path=None) -> str:
+    """Returns the version of the opinions, with the version of the NLP tools
+    and the pages scored. It is the version of the opinion cache.
+
+    :param pages: number max of pages scored by e-print, None for no limit.
+    :type pages: int
+
+    :param references: the references section is not scored.
+    :type references: bool
+
+    :param data_path: path to the local NLTK data folder, None to use the
+        NLTK default folders.
+    :type data_path: :class:`pathlib.PurePath`"""
+    version = NLP.get_version(data_path)
+    if pages is not None:
+        version += ';pages={}'.format(pages)
+    if references:
+        version += ';references'
+    return version
+
+def init_worker(cache_path=None, pages=None, references=False, memo_path=None,
+                data_path=None, text_corpus=None) -> None:
+    """Initializer of the worker processes: loads the NLP resources (opinion
+    lexicon, stopwords and WordNet) once, instead of once per e-print.
+
+    :param cache_path: path to the opinion cache, None to not use it.
+    :type cache_path: :class:`pathlib.PurePath`
+
+    :param pages: number max of pages scored by e-print, None for no limit.
+    :type pages: int
+
+    :param references: the references section and the following pages are
+        not scored.
+    :type references: bool
+
+    :param memo_path: path to the memo of lemmas shared by all runs, loaded
+        now and saved when the process exits. None to not save it.
+    :type memo_path: :class:`pathlib.PurePath`
+
+    :param data_path: path to the local NLTK data folder, None to use the
+        NLTK default folders.
+    :type data_path: :class:`pathlib.PurePath`
+
+    :param text_corpus: text of the e-prints already extracted, the others
+        are read from their PDF. None to read all PDF.
+    :type text_corpus: :class:`.text_corpus.TextCorpus`"""
+    global nlp, scorer, cache, corpus, max_pages, stop_at_references
+    nlp = NLP(memo_path=memo_path, data_path=data_path)
+    corpus = text_corpus
+    Finalize(None, close_worker, args=(memo_path,), exitpriority=10)
+    scorer = LexiconScorer(nlp)
+    max_pages = pages
+    stop_at_references = references
+    if cache_path is not None:
+        cache = OpinionCache(cache_path, get_version(pages, references, data_path),
+                             read_only=True)
+
+def close_worker(memo_path=None) -> None:
+    """Finalizer of the worker processes: prints the hit rate of the memo of
+    lemmas and saves it.
+
+    :param memo_path: path to the memo of lemmas, None to not save it.
+    :type memo_path: :class:`pathlib.PurePath`"""
+    memo = nlp.lemmatize
+    print('Lemma memo : {} hits, {} misses ({:.1%})'.format(memo.hits,
+                                                            memo.misses,
+                                                            memo.hit_rate()))
+    if memo_path is not None:
+        memo.save(memo_path)
 
 def process_opinion(index_path):
     """Processes an e-print.
@@ -11,25 +123,85 @@ def process_opinion(index_path):
     :param index_path: contain the :class:`pandas.DataFrame` index and the path to this e-print."""
     index = index_path[0]
     path = str(index_path[1])
+    key = OpinionCache.get_key(path)
+    # Already scored in another snapshot or category
+    if cache is not None:
+        opinion = cache.get(key)
+        if opinion is not None:
+            return {'index': index,
+                    'key': key,
+                    'path': path,
+                    'opinion': opinion,
+                    'cached': True}
+
     print('Start : ' + path)
+    # Time and memory limits are enforced by the pool, which kills the worker
+    pdf_file = None
+    pages = None
     try:
-        # Open file
-        try:
+        if corpus is not None and key in corpus:
+            # Text already extracted
+            pages = corpus.get(key)
+        else:
+            # Open file, already resolved by the manifest
             pdf_file = fitz.open(path)
-        except:
-            pdf_file = fitz.open(path[:-5] + '1.pdf')
+            pages = (page.getText() for page in pdf_file)
 
-        text = ''.join([page.getText() for page in pdf_file])
-        pdf_file.close()
+        if nlp is None:
+            init_worker()
 
-        nlp = NLP()
-        return {'index': index,
-                'opinion': nlp.opinion(nlp.cleaning(text))}
+        # Score page by page, only one page of text is in memory
+        positive, negative, total = 0, 0, 0
+        for page_number, text in enumerate(pages):
+            if max_pages is not None and page_number >= max_pages:
+                break
+            end = references_start(text) if stop_at_references else None
+            counts = scorer.counts([nlp.cleaning(text[:end])])
+            positive += int(counts[0][0])
+            negative += int(counts[1][0])
+            total += int(counts[2][0])
+            if end is not None:
+                break
+        opinion = nlp.opinion_of_counts(positive, negative, total)
+    except MemoryError:
+        print('memory file : ' + path)
+        opinion = ERROR_MEMORY
     except Exception as e:
-        # On error occured
-        print('error file : ' + str(e))
-        return {'index': index,
-                'opinion': -5.}
+        if isinstance(e, RuntimeError) and MUPDF_MEMORY_ERROR.search(str(e)):
+            print('memory file : ' + path)
+            opinion = ERROR_MEMORY
+        else:
+            # On error occured
+            print('error file : ' + str(e))
+            opinion = ERROR
+    finally:
+        # Pages are read lazily, until the last one scored
+        if pages is not None:
+            pages.close()
+        if pdf_file is not None:
+            pdf_file.close()
+    return {'index': index,
+            'key': key,
+            'path': path,
+            'opinion': opinion,
+            'cached': False}
+
+def failed_opinion(index_path, reason):
+    """Returns the result of an e-print whose worker was killed by the pool
+    (see :class:`.supervised_pool.SupervisedPool`).
+
+    :param index_path: task of the e-print, see :func:`process_opinion`.
+    :type index_path: tuple
+
+    :param reason: reason of the failure.
+    :type reason: str"""
+    path = str(index_path[1])
+    print('{} file : {}'.format(reason, path))
+    return {'index': index_path[0],
+            'key': OpinionCache.get_key(path),
+            'path': path,
+            'opinion': POOL_ERRORS[reason],
+            'cached': False}
 
 class OpinionProcessing:
     """This class spawns process. Each of them computes the opinion of
@@ -42,69 +214,340 @@ class OpinionProcessing:
     :type output_path: str
 
     :param crtc_name: name of the current CRTC, used to name the result folder.
-    :type crtc_name: str"""
+    :type crtc_name: str
+
+    :param cache_path: path to the opinion cache shared by all snapshots and
+        categories, None to not use it.
+    :type cache_path: :class:`pathlib.PurePath`"""
     def __init__(self,
                  serie_path,
                  output_path,
-                 crtc_name):
-        # nltk initialisation
-
-        # Importing the dictionary (lexicon) of opinion words
-        # (from Bing Liu and collaborators
-        # (https://www.cs.uic.edu/~liub/FBS/opinion-analysis.html))
-        nltk.download('opinion_lexicon')
-        # Cleaning the dataset from common english words
-        nltk.download('stopwords')
-        # Wordnet is a lexical database for the English language that helps
-        # the script determine the base word
-        nltk.download('wordnet')
-
+                 crtc_name,
+                 cache_path=None):
         #: :class:`pandas.Series` of all articles path
         self.serie_path = serie_path
         #: Size of the :attr:`self.serie_path`
         self.nb_paths = len(list(serie_path))
+        #: Key of each e-print (see :meth:`.opinion_cache.OpinionCache.get_key`),
+        #: saved with its opinion to resume only the same e-print at an index
+        self.keys = serie_path.map(OpinionCache.get_key)
 
         # For save results
         #: Destination folder for computed articles
         self.output_path = output_path
-        #: Used for the construction the final .csv
-        self.opinion_list = {'index': [], 'opinion': []}
+        #: Results not written yet
+        self.opinion_list = {'index': [], 'key': [], 'opinion': []}
         #: Name of the CRTC
         self.crtc_name = crtc_name
         #: Detected errors
         self.errors = 0
+        #: Errors not written yet
+        self.errors_list = {'index': [], 'path': [], 'error': []}
+        #: Path to the .errors file (a .csv of e-prints on error, with their last error code)
+        self.errors_path = self.output_path.joinpath(self.crtc_name + '.errors')
+        #: Path to the final .csv
+        self.result_path = self.output_path.joinpath(self.crtc_name + '.csv')
+        #: Results appended by chunks, compacted into :attr:`result_path` at the end
+        self.part_sink = CSVAppendSink(str(self.result_path) + '.part')
+
+        #: Number max of buffered results before a flush
+        self.FLUSH_SIZE = 1000
+        #: Time max between two flushes (in seconds)
+        self.FLUSH_INTERVAL = 30.
+        #: Time of the last flush
+        self.last_flush = time.monotonic()
+
+        #: Path to the opinion cache
+        self.cache_path = cache_path
+        #: Opinion cache, written only by this process (set by :func:`processing_pool`)
+        self.cache = None
+        #: New opinions not saved into the cache yet
+        self.cache_list = []
 
 
     def process_result_pool(self, result) -> None:
-        """Stocks the result into a .csv file.
+        """Buffers the result, the buffer is appended to the .part file every
+        :attr:`FLUSH_SIZE` results or :attr:`FLUSH_INTERVAL` seconds.
 
         :param result: opinion and index of the e-print to be saved.
         :type result: dict"""
         # Save into a file if no errors occured
-        opinion_list = self.opinion_list
         if result['opinion'] > -4. :
-            opinion_list['index'].append(result['index'])
-            opinion_list['opinion'].append(result['opinion'])
-            # Use panda to stock data into csv
-            df = pd.DataFrame(data={'opinion': opinion_list['opinion']},
-                              index=opinion_list['index'])
-
-            df.to_csv(self.output_path.joinpath(self.crtc_name + '.csv'),
-                      mode='w')
+            self.opinion_list['index'].append(result['index'])
+            # Key of the requested e-print, not of the fallback version scored
+            self.opinion_list['key'].append(self.keys.loc[result['index']])
+            self.opinion_list['opinion'].append(result['opinion'])
+            if not result['cached']:
+                self.cache_list.append((result['key'], result['opinion']))
         else :
             self.errors += 1
+            self.errors_list['index'].append(result['index'])
+            self.errors_list['path'].append(result['path'])
+            self.errors_list['error'].append(result['opinion'])
+
+        if len(self.opinion_list['index']) >= self.FLUSH_SIZE \
+           or time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Appends the buffered results to the .part file."""
+        if len(self.opinion_list['index']) > 0:
+            self.part_sink.append(pd.DataFrame(self.opinion_list))
+            self.opinion_list = {'index': [], 'key': [], 'opinion': []}
+        if len(self.errors_list['index']) > 0:
+            # Errors are appended, the .errors file is cleaned by :meth:`compact`
+            header = not os.path.exists(self.errors_path)
+            pd.DataFrame(self.errors_list).to_csv(self.errors_path,
+                                                  mode='a',
+                                                  header=header,
+                                                  index=False)
+            self.errors_list = {'index': [], 'path': [], 'error': []}
+        if self.cache is not None and len(self.cache_list) > 0:
+            self.cache.put(self.cache_list)
+            self.cache_list = []
+        self.last_flush = time.monotonic()
+
+    def compact(self) -> None:
+        """Writes the final .csv (indexed by e-print, in the order of
+        completion) from the .part file, then removes the .part file. The
+        .errors file is rewritten with one row per e-print still on error,
+        with its last error code. Both files are replaced atomically (see
+        :meth:`replace_csv`)."""
+        self.flush()
+        if self.part_sink.rows > 0:
+            df = pd.read_csv(self.part_sink.path, index_col=0, dtype='str')
+        else:
+            df = pd.DataFrame({'index': [], 'key': [], 'opinion': []})
+        df = df.set_index('index').rename_axis(None)
+        self.replace_csv(df, self.result_path)
+
+        if os.path.exists(self.errors_path):
+            # Only the last error of the e-prints still not scored is kept,
+            # the ones retried by each run would be duplicated
+            errors = pd.read_csv(self.errors_path, dtype='str')
+            errors = errors[errors['index'].isin(self.serie_path.index.astype(str))
+                            & ~errors['index'].isin(df.index)]
+            errors = errors.drop_duplicates('index', keep='last')
+            self.replace_csv(errors, self.errors_path, index=False)
 
-    def processing(self, process_number: int):
+        for path in [self.part_sink.path, self.part_sink.marker_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def replace_csv(df, path, index=True) -> None:
+        """Writes `df` into the .csv file `path`. The file is replaced
+        atomically, so it is either the previous one or the complete new one.
+
+        :param df: rows to write.
+        :type df: :class:`pandas.DataFrame`
+
+        :param path: path to the .csv file.
+        :type path: :class:`pathlib.PurePath`
+
+        :param index: writes the index of `df`.
+        :type index: bool"""
+        tmp_path = str(path) + '.tmp'
+        with open(tmp_path, 'w', newline='') as csv_file:
+            df.to_csv(csv_file, index=index)
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+        os.replace(tmp_path, path)
+
+    def resume(self) -> pd.DataFrame:
+        """Restores the results of a previous run from the .part file (or
+        from the final .csv if the run went to the end) and returns them
+        ('index', 'key' and 'opinion' columns, as strings). E-prints which
+        ended on an error are not saved, so they are scored again. Results
+        saved without their key are dropped and scored again."""
+        if self.part_sink.resume() is None:
+            # Start a new .part file, with the final .csv if any
+            self.part_sink = CSVAppendSink(self.part_sink.path)
+            if os.path.exists(self.result_path):
+                df = pd.read_csv(self.result_path, index_col=0, dtype='str')
+                if 'key' in df.columns:
+                    self.part_sink.append(pd.DataFrame({'index': df.index,
+                                                        'key': df['key'],
+                                                        'opinion': df['opinion']}))
+        if self.part_sink.rows > 0:
+            df = pd.read_csv(self.part_sink.path, index_col=0, dtype='str')
+            if 'key' in df.columns:
+                return df
+            self.part_sink = CSVAppendSink(self.part_sink.path)
+        return pd.DataFrame({'index': [], 'key': [], 'opinion': []}, dtype='str')
+
+    def get_tasks(self, position):
+        """Resumes the previous run and returns the tasks of the e-prints not
+        scored yet: ((`position`, index), path). A result is kept only if the
+        e-print at its index is the same (same key), the others are removed
+        from the .part file and scored again: the rows of a new snapshot can
+        be shifted.
+
+        :param position: position of this object in the list given to
+            :func:`processing_pool`, used to route the results.
+        :type position: int"""
+        # Skip e-prints already scored by an interrupted run
+        df = self.resume()
+        keys = pd.Series(self.keys.values, index=self.keys.index.astype(str))
+        same = df['key'].values == keys.reindex(df['index']).values
+        if not same.all():
+            # Rewrite the .part file without the results of other e-prints
+            self.part_sink = CSVAppendSink(self.part_sink.path)
+            if same.any():
+                self.part_sink.append(df[same].reset_index(drop=True))
+            print('Category : {}; {} results of other e-prints dropped'.format(
+                self.crtc_name, (~same).sum()))
+        to_score = ~keys.index.isin(df['index'][same])
+        serie_path = self.serie_path[to_score]
+        print('Category : {}; {} e-prints already scored, {} to score'.format(
+            self.crtc_name, len(self.serie_path) - len(serie_path), len(serie_path)))
+        return [((position, index), path)
+                for index, path in zip(serie_path.index, serie_path.values)]
+
+    def finish(self) -> None:
+        """Writes the final .csv once all e-prints are processed."""
+        self.compact()
+        print('Category : {}; {} errors'.format(self.crtc_name, self.errors))
+
+    def processing(self, process_number: int, **options):
         """Creates all process and wait to their returns.
 
         :param process_number: number max of ongoing processes.
-        :type process_number: int"""
-        i = 0
-        with Pool(process_number) as pool:
-            for res in pool.imap_unordered(process_opinion,
-                                           zip(self.serie_path.index,
-                                               self.serie_path.values)):
-                self.process_result_pool(res)
-                print('Get ' + str(i))
-                i += 1
-        print(self.errors)
+        :type process_number: int
+
+        :param options: limits and pages scored, see :func:`processing_pool`.
+        :type options: dict"""
+        processing_pool([self], process_number, self.cache_path, **options)
+
+def processing_pool(processings, process_number, cache_path=None,
+                    document_timeout=None, memory=None, max_tasks=None,
+                    max_pages=None, stop_at_references=False,
+                    memo_path=None, data_path=None, corpus_path=None) -> None:
+    """Scores the e-prints of several :class:`OpinionProcessing` with one
+    pool, fed by a single queue spanning all of them: the workers don't wait
+    for the slowest e-prints of a category before starting the next one. Each
+    result is routed to its :class:`OpinionProcessing`, which is finished as
+    soon as all its e-prints are processed.
+
+    :param processings: categories to score.
+    :type processings: [:class:`OpinionProcessing`]
+
+    :param process_number: number max of ongoing processes.
+    :type process_number: int
+
+    :param cache_path: path to the opinion cache read by the workers, None to
+        not use it.
+    :type cache_path: :class:`pathlib.PurePath`
+
+    :param document_timeout: time max to process an e-print (in seconds),
+        None for no limit. The worker is then killed and replaced.
+    :type document_timeout: float
+
+    :param memory: resident memory max of a worker (in bytes), None for no
+        limit. The worker is then killed and replaced.
+    :type memory: int
+
+    :param max_tasks: number of e-prints processed by a worker before it is
+        replaced by a new one (releasing its memory), None for no limit.
+    :type max_tasks: int
+
+    :param max_pages: number max of pages scored by e-print, None for no
+        limit.
+    :type max_pages: int
+
+    :param stop_at_references: the references section and the following
+        pages are not scored.
+    :type stop_at_references: bool
+
+    :param memo_path: path to the memo of lemmas, loaded by the workers when
+        they start and saved when they exit. None to not save it.
+    :type memo_path: :class:`pathlib.PurePath`
+
+    :param data_path: path to the local NLTK data folder, None to use the
+        NLTK default folders.
+    :type data_path: :class:`pathlib.PurePath`
+
+    :param corpus_path: path to the text corpus made by ``extract_text.py``,
+        e-prints found into it are not read from their PDF. None to read all
+        PDF.
+    :type corpus_path: :class:`pathlib.PurePath`"""
+    # Loaded once, the forked workers share them
+    load_resources(data_path)
+    text_corpus = None if corpus_path is None else TextCorpus(corpus_path)
+
+    # Opinions are cached by version of the NLP tools and pages scored
+    cache = None
+    if cache_path is not None:
+        cache = OpinionCache(cache_path, get_version(max_pages, stop_at_references,
+                                                   data_path))
+    for processing in processings:
+        processing.cache = cache
+
+    tasks = [processing.get_tasks(position)
+             for position, processing in enumerate(processings)]
+
+    # E-prints whose text or opinion is already known don't need their PDF
+    known = lambda key: (text_corpus is not None and key in text_corpus) \
+                        or (cache is not None and cache.get(key) is not None)
+    known_keys = {OpinionCache.get_key(path) for category_tasks in tasks
+                  for _, path in category_tasks}
+    known_keys = {key for key in known_keys if known(key)}
+
+    # Find the PDF of the other e-prints before the pool, missing ones are
+    # errors (unless the text or opinion of their fallback version is known)
+    manifest = ArXivManifest(path for category_tasks in tasks
+                             for _, path in category_tasks
+                             if OpinionCache.get_key(path) not in known_keys)
+    for position, processing in enumerate(processings):
+        resolved_tasks = []
+        for (_, index), path in tasks[position]:
+            key = OpinionCache.get_key(path)
+            if key in known_keys:
+                pdf_path = path
+            else:
+                pdf_path = manifest.resolve(path)
+            if pdf_path is None \
+               and known(OpinionCache.get_key(ArXivManifest.first_version(path))):
+                # Extracted or scored from its fallback (see extract_text.py)
+                pdf_path = ArXivManifest.first_version(path)
+            if pdf_path is not None:
+                resolved_tasks.append(((position, index), pdf_path))
+            else:
+                processing.process_result_pool({'index': index,
+                                                'key': key,
+                                                'path': str(path),
+                                                'opinion': ERROR_MISSING,
+                                                'cached': False})
+        if len(resolved_tasks) < len(tasks[position]):
+            print('Category : {}; {} e-prints missing from the arXiv folder'.format(
+                processing.crtc_name, len(tasks[position]) - len(resolved_tasks)))
+        tasks[position] = resolved_tasks
+
+    # E-prints still to process, by category
+    remaining = [len(category_tasks) for category_tasks in tasks]
+    for processing, count in zip(processings, remaining):
+        if count == 0:
+            processing.finish()
+
+    i = 0
+    with SupervisedPool(process_number,
+                        initializer=init_worker,
+                        initargs=(cache_path, max_pages, stop_at_references,
+                                  memo_path, data_path, text_corpus),
+                        max_tasks=max_tasks,
+                        timeout=document_timeout,
+                        memory=memory) as pool:
+        # Workers exit normally at the end, to save their memo of lemmas
+        for res in pool.imap_unordered(process_opinion,
+                                       itertools.chain.from_iterable(tasks),
+                                       failed_opinion):
+            position, res['index'] = res['index']
+            processings[position].process_result_pool(res)
+            print('Get ' + str(i))
+            i += 1
+
+            remaining[position] -= 1
+            if remaining[position] == 0:
+                processings[position].finish()
+    if cache is not None:
+        cache.close()
@@ -0,0 +1,79 @@
+"""OpinionCache class definition, a persistent cache of the opinions of
+e-prints, shared by all snapshots and all categories."""
+
+import sqlite3
+from pathlib import Path, PurePath
+
+class OpinionCache:
+    """Maps an e-print version ('<archive>/<id>v<version>') and the version of
+    the NLP tools to the opinion of the e-print. An e-print is then extracted
+    and scored once, whatever the number of snapshots and categories it
+    appears in, until the NLP tools change.
+
+    The worker processes open the cache read only, only the main process
+    writes into it.
+
+    :param path: Path to the SQLite database, created if it doesn't exist
+        (unless `read_only`).
+    :type path: :class:`pathlib.PurePath`
+
+    :param version: version of the NLP tools (see
+        :meth:`src.NLP_tools.nlp.NLP.get_version`).
+    :type version: str
+
+    :param read_only: opens an existing cache read only.
+    :type read_only: bool"""
+    def __init__(self, path, version, read_only=False):
+        #: Version of the NLP tools
+        self.version = version
+        if read_only:
+            #: Connection to the database
+            self.connection = sqlite3.connect(Path(path).resolve().as_uri() + '?mode=ro',
+                                              uri=True)
+        else:
+            self.connection = sqlite3.connect(str(path))
+            # Readers don't wait for the writer
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS opinions (
+                    key TEXT,
+                    version TEXT,
+                    opinion REAL,
+                    PRIMARY KEY (key, version)
+                )''')
+            self.connection.commit()
+
+    @staticmethod
+    def get_key(path) -> str:
+        """Returns the key of an e-print from its path in the arXiv folder:
+        '<arxiv>/<archive>/pdf/<yymm>/<id>v<version>.pdf' gives
+        '<archive>/<id>v<version>'.
+
+        :param path: path to the e-print.
+        :type path: :class:`pathlib.PurePath`"""
+        path = PurePath(path)
+        return path.parts[-4] + '/' + path.stem
+
+    def get(self, key):
+        """Returns the cached opinion of an e-print, or None.
+
+        :param key: key of the e-print (see :meth:`get_key`).
+        :type key: str"""
+        row = self.connection.execute(
+            'SELECT opinion FROM opinions WHERE key = ? AND version = ?',
+            (key, self.version)).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, opinions) -> None:
+        """Saves opinions into the cache, in one transaction.
+
+        :param opinions: (key, opinion) of e-prints.
+        :type opinions: [(str, float)]"""
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO opinions (key, version, opinion) VALUES (?, ?, ?)',
+                [(key, self.version, opinion) for key, opinion in opinions])
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        self.connection.close()
@@ -0,0 +1,248 @@
+"""SupervisedPool class definition, a pool of worker processes whose limits
+are enforced by the parent process: a worker over its time or memory limit is
+killed and replaced, even when it is stuck in native code (e.g. MuPDF), and
+the task of a worker which dies is reported instead of being lost."""
+
+import os
+import time
+import signal
+import multiprocessing
+from multiprocessing.connection import wait
+
+#: Failure of a task which took more than the timeout
+TIMEOUT = 'timeout'
+#: Failure of a task whose worker used more than the memory limit, or was
+#: killed by the system (e.g. the OOM killer)
+MEMORY = 'memory'
+#: Failure of a task whose worker died (e.g. a crash of a native library)
+CRASH = 'crash'
+
+#: End of the tasks
+END = object()
+
+def worker_loop(connection, func, initializer=None, initargs=()) -> None:
+    """Main function of a worker: runs `func` on each task received, until
+    None is received.
+
+    :param connection: end of the pipe of the worker.
+    :type connection: :class:`multiprocessing.connection.Connection`
+
+    :param func: function applied to the tasks.
+    :type func: callable
+
+    :param initializer: function called when the worker starts.
+    :type initializer: callable
+
+    :param initargs: arguments of `initializer`.
+    :type initargs: tuple"""
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        connection.send(func(task))
+
+def get_rss(pid) -> int:
+    """Returns the resident memory of a process (in bytes), 0 if it is
+    unknown.
+
+    :param pid: id of the process.
+    :type pid: int"""
+    try:
+        with open('/proc/{}/statm'.format(pid), 'r') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class Worker:
+    """A worker process, with the task it is processing.
+
+    :param func: function applied to the tasks.
+    :type func: callable
+
+    :param initializer: function called when the worker starts.
+    :type initializer: callable
+
+    :param initargs: arguments of `initializer`.
+    :type initargs: tuple"""
+    def __init__(self, func, initializer=None, initargs=()):
+        #: End of the pipe of the parent
+        self.connection, child_connection = multiprocessing.Pipe()
+        #: Worker process
+        self.process = multiprocessing.Process(target=worker_loop,
+                                               args=(child_connection, func,
+                                                     initializer, initargs),
+                                               daemon=True)
+        self.process.start()
+        child_connection.close()
+        #: Task being processed, None if the worker is idle
+        self.task = None
+        #: Time when the task was sent
+        self.start = None
+        #: Number of tasks processed
+        self.done = 0
+
+    def send(self, task) -> None:
+        """Sends a task to the worker."""
+        self.connection.send(task)
+        self.task = task
+        self.start = time.monotonic()
+
+    def stop(self) -> None:
+        """Asks the worker to exit after its current task and waits for it,
+        so that its finalizers run."""
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join()
+        self.connection.close()
+
+    def kill(self) -> None:
+        """Kills the worker immediately."""
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+class SupervisedPool:
+    """Pool of worker processes, each of them processes one task at a time.
+    The parent checks every :attr:`POLL_INTERVAL` seconds the time spent on
+    each task and the resident memory of each worker: a worker over a limit
+    is killed, its task is reported as failed and a new worker replaces it.
+
+    :param processes: number of worker processes.
+    :type processes: int
+
+    :param initializer: function called when a worker starts.
+    :type initializer: callable
+
+    :param initargs: arguments of `initializer`.
+    :type initargs: tuple
+
+    :param max_tasks: number of tasks processed by a worker before it is
+        replaced by a new one, None for no limit.
+    :type max_tasks: int
+
+    :param timeout: time max to process a task (in seconds), None for no
+        limit.
+    :type timeout: float
+
+    :param memory: resident memory max of a worker (in bytes), None for no
+        limit.
+    :type memory: int"""
+
+    #: Time between two checks of the limits (in seconds)
+    POLL_INTERVAL = 1.
+
+    def __init__(self, processes, initializer=None, initargs=(),
+                 max_tasks=None, timeout=None, memory=None):
+        #: Number of worker processes
+        self.processes = processes
+        #: Function called when a worker starts
+        self.initializer = initializer
+        #: Arguments of the initializer
+        self.initargs = initargs
+        #: Number of tasks processed by a worker before it is replaced
+        self.max_tasks = max_tasks
+        #: Time max to process a task (in seconds)
+        self.timeout = timeout
+        #: Resident memory max of a worker (in bytes)
+        self.memory = memory
+        #: Running workers
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.terminate()
+
+    def imap_unordered(self, func, iterable, failed):
+        """Applies `func` to each task of `iterable` and yields the results in
+        the order of completion. A task whose worker is killed or dies yields
+        ``failed(task, reason)`` instead, with the reason :data:`TIMEOUT`,
+        :data:`MEMORY` or :data:`CRASH`.
+
+        :param func: function applied to the tasks, it must not raise.
+        :type func: callable
+
+        :param iterable: tasks.
+        :type iterable: iterable
+
+        :param failed: function returning the result of a failed task.
+        :type failed: callable"""
+        tasks = iter(iterable)
+        exhausted = False
+        while True:
+            # Feed the idle workers, new workers are started when needed
+            while not exhausted and (len(self.workers) < self.processes
+                                     or any(w.task is None for w in self.workers)):
+                task = next(tasks, END)
+                if task is END:
+                    exhausted = True
+                    break
+                idle = [w for w in self.workers if w.task is None]
+                if len(idle) > 0:
+                    worker = idle[0]
+                else:
+                    worker = Worker(func, self.initializer, self.initargs)
+                    self.workers.append(worker)
+                worker.send(task)
+
+            busy = [w for w in self.workers if w.task is not None]
+            if len(busy) == 0:
+                break
+            wait([w.connection for w in busy] + [w.process.sentinel for w in busy],
+                 timeout=self.POLL_INTERVAL)
+
+            now = time.monotonic()
+            for worker in busy:
+                task = worker.task
+                if worker.connection.poll():
+                    try:
+                        result = worker.connection.recv()
+                    except (EOFError, OSError):
+                        # Died before the end of its result
+                        yield failed(task, self.__replace(worker, False))
+                        continue
+                    worker.task = None
+                    worker.done += 1
+                    if self.max_tasks is not None and worker.done >= self.max_tasks:
+                        # Releases the memory of the worker
+                        worker.stop()
+                        self.workers.remove(worker)
+                    yield result
+                elif not worker.process.is_alive():
+                    yield failed(task, self.__replace(worker, False))
+                elif self.timeout is not None and now - worker.start > self.timeout:
+                    self.__replace(worker, True)
+                    yield failed(task, TIMEOUT)
+                elif self.memory is not None and get_rss(worker.process.pid) > self.memory:
+                    self.__replace(worker, True)
+                    yield failed(task, MEMORY)
+        self.close()
+
+    def __replace(self, worker, kill):
+        """Removes a worker, killed if `kill`, and returns the reason of its
+        death. The next task starts a new worker."""
+        if kill:
+            worker.kill()
+        else:
+            worker.process.join()
+            worker.connection.close()
+        self.workers.remove(worker)
+        # Killed by the system, most often by the OOM killer
+        return MEMORY if worker.process.exitcode == -signal.SIGKILL else CRASH
+
+    def close(self) -> None:
+        """Stops the idle workers, they exit normally."""
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+
+    def terminate(self) -> None:
+        """Kills all workers."""
+        for worker in self.workers:
+            worker.kill()
+        self.workers = []
@@ -0,0 +1,137 @@
+"""TextCorpus class definition, the text of e-prints extracted once from their
+PDF, so that the opinion can be computed again without MuPDF."""
+
+import os
+import gzip
+import json
+import zlib
+import itertools
+import fitz
+
+def extract_document(key_path):
+    """Extracts the text of each page of an e-print. Returns a dict with the
+    key and the pages of the e-print (None on error).
+
+    :param key_path: key (see :meth:`.opinion_cache.OpinionCache.get_key`)
+        and path of the e-print.
+    :type key_path: (str, :class:`pathlib.PurePath`)"""
+    key, path = key_path
+    print('Start : ' + str(path))
+    try:
+        pdf_file = fitz.open(str(path))
+        pages = [page.getText() for page in pdf_file]
+        pdf_file.close()
+    except Exception as e:
+        print('error file : ' + str(e))
+        pages = None
+    return {'key': key, 'pages': pages}
+
+class TextCorpus:
+    """Folder of shards ``<number>.jsonl.gz``. An e-print is the JSON line
+    ``{"key": key, "pages": number of pages}`` followed by a JSON line with
+    the text of each page, compressed as its own gzip member, so a shard can
+    be read with ``zcat`` and a single e-print can be read without
+    decompressing its shard. Pages are decompressed one at a time, only one
+    page of an e-print is in memory. The position of each e-print is saved
+    into ``<number>.idx``, after the e-print is written: an interrupted
+    writing leaves at most an unindexed tail.
+
+    New e-prints are always written into new shards.
+
+    :param path: Path to the corpus folder, created if it doesn't exist.
+    :type path: :class:`pathlib.PurePath`"""
+    def __init__(self, path):
+        #: Path to the corpus folder
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        #: Position of the e-prints: key -> (shard, offset, length)
+        self.index = {}
+        for file in sorted(os.listdir(path)):
+            if file.endswith('.idx'):
+                self.__load_index(file[:-len('.idx')])
+
+        #: Number max of e-prints by shard
+        self.SHARD_SIZE = 10000
+        #: Shard being written, None before the first e-print
+        self.shard = None
+        #: Number of e-prints written into :attr:`shard`
+        self.shard_count = 0
+        self.__data_file = None
+        self.__index_file = None
+
+    def __load_index(self, shard) -> None:
+        """Loads the index of a shard, without its incomplete tail."""
+        size = os.path.getsize(os.path.join(self.path, shard + '.jsonl.gz'))
+        with open(os.path.join(self.path, shard + '.idx'), 'r') as index_file:
+            for line in index_file:
+                if not line.endswith('\n'):
+                    break
+                key, offset, length = line.split('\t')
+                if int(offset) + int(length) > size:
+                    break
+                self.index[key] = (shard, int(offset), int(length))
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, key):
+        """Yields the text of each page of an e-print, decompressed page by
+        page.
+
+        :param key: key of the e-print.
+        :type key: str"""
+        shard, offset, _ = self.index[key]
+        with open(os.path.join(self.path, shard + '.jsonl.gz'), 'rb') as data_file:
+            data_file.seek(offset)
+            # Only the lines of this e-print are read from its gzip member
+            with gzip.GzipFile(fileobj=data_file, mode='rb') as record:
+                header = json.loads(record.readline())
+                for _ in range(header['pages']):
+                    yield json.loads(record.readline())
+
+    def add(self, key, pages) -> None:
+        """Writes the pages of an e-print at the end of the current shard.
+
+        :param key: key of the e-print.
+        :type key: str
+
+        :param pages: text of each page.
+        :type pages: list[str]"""
+        if self.shard is None or self.shard_count >= self.SHARD_SIZE:
+            self.__new_shard()
+
+        # A gzip member, compressed line by line
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        offset = self.__data_file.tell()
+        for line in itertools.chain([{'key': key, 'pages': len(pages)}], pages):
+            self.__data_file.write(compressor.compress(
+                (json.dumps(line) + '\n').encode('utf-8')))
+        self.__data_file.write(compressor.flush())
+        self.__data_file.flush()
+        length = self.__data_file.tell() - offset
+        self.__index_file.write('{}\t{}\t{}\n'.format(key, offset, length))
+        self.__index_file.flush()
+
+        self.index[key] = (self.shard, offset, length)
+        self.shard_count += 1
+
+    def __new_shard(self) -> None:
+        """Closes the current shard and starts a new one."""
+        self.close()
+        numbers = [int(file[:-len('.idx')]) for file in os.listdir(self.path)
+                   if file.endswith('.idx')]
+        self.shard = '{:05d}'.format(max(numbers, default=-1) + 1)
+        self.shard_count = 0
+        self.__data_file = open(os.path.join(self.path, self.shard + '.jsonl.gz'), 'wb')
+        self.__index_file = open(os.path.join(self.path, self.shard + '.idx'), 'w')
+
+    def close(self) -> None:
+        """Closes the shard being written."""
+        if self.__data_file is not None:
+            self.__data_file.close()
+            self.__index_file.close()
+            self.__data_file = None
+            self.__index_file = None
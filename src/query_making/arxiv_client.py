@@ -0,0 +1,112 @@
+"""ArXivClient class definition, the HTTP client of the arXiv API. All clients
+of a process share one rate limit and one pooled HTTP session."""
+
+import time
+import threading
+import traceback
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+class TokenBucket:
+    """Thread-safe token bucket: a token is added every `interval` seconds, up
+    to `capacity` tokens, and each request consumes one token.
+
+    :param interval: time between two tokens (in seconds).
+    :type interval: float
+
+    :param capacity: maximum number of saved tokens.
+    :type capacity: int"""
+    def __init__(self, interval, capacity=1):
+        #: Time between two tokens (in seconds)
+        self.interval = interval
+        #: Maximum number of saved tokens
+        self.capacity = capacity
+        #: Available tokens
+        self.tokens = capacity
+        #: Time of the last refill
+        self.last = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Waits until a token is available and consumes it."""
+        with self.__lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.last) / self.interval)
+            self.last = now
+            # Tokens can go negative, the wait is then reserved for this call
+            self.tokens -= 1
+            wait = -self.tokens * self.interval if self.tokens < 0 else 0.
+        if wait > 0:
+            time.sleep(wait)
+
+class ArXivClient:
+    """Does requests on the arXiv API. Requests respect the rate limit of the
+    API (one every 3 seconds) globally, are retried with a capped exponential
+    backoff and can be sent in the background to overlap the wait with other
+    work.
+
+    :param url: URL of the API, can be a local stub server.
+    :type url: str"""
+
+    #: URL of the arXiv API
+    URL = 'http://export.arxiv.org/api/query'
+    #: Rate limit shared by all clients: one request every 3 seconds
+    BUCKET = TokenBucket(3.)
+    #: Pooled HTTP session shared by all clients
+    SESSION = requests.Session()
+
+    def __init__(self, url=None):
+        #: URL of the API
+        self.url = self.URL if url is None else url
+        #: Number max of attempts of a request
+        self.MAX_RETRY = 20
+        #: First wait before a retry (in seconds)
+        self.BACKOFF = 1.
+        #: Maximum wait before a retry (in seconds)
+        self.MAX_BACKOFF = 60.
+        #: Background thread used by :meth:`submit`
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+
+    def get(self, parameters) -> str:
+        """Does a request and returns the text of the response.
+
+        :param parameters: restAPI parameters.
+        :type parameters: dict"""
+        for i in range(self.MAX_RETRY):
+            self.BUCKET.acquire()
+            try:
+                print(str(i) + ' attempt')
+                req = self.SESSION.get(self.url, params=parameters, timeout=60)
+                req.raise_for_status()
+                return req.text
+            except (requests.ConnectionError,
+                    requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.HTTPError) as e:
+                # Errors of the request itself (e.g. a malformed query) are not retried
+                if isinstance(e, requests.HTTPError) \
+                   and not self.is_transient(e.response.status_code):
+                    raise
+                # Retry later if a transient error occur
+                logging.error(traceback.format_exc())
+                time.sleep(min(self.MAX_BACKOFF, self.BACKOFF * 2 ** i))
+        raise RuntimeError('Error, request failed {} times'.format(self.MAX_RETRY))
+
+    @staticmethod
+    def is_transient(status_code) -> bool:
+        """Returns True if an HTTP error is transient and the request can be
+        retried: too many requests (429) or a server error (5xx).
+
+        :param status_code: HTTP status code of the response.
+        :type status_code: int"""
+        return status_code == 429 or status_code >= 500
+
+    def submit(self, parameters):
+        """Does a request in the background, returns a
+        :class:`concurrent.futures.Future` of the text of the response.
+
+        :param parameters: restAPI parameters (copied).
+        :type parameters: dict"""
+        return self.__executor.submit(self.get, dict(parameters))
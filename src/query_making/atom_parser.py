@@ -0,0 +1,113 @@
+"""Streaming parser of the Atom feed returned by the arXiv API. It reads only
+the fields used by :class:`.query_arxiv_cat.QueryArXivCat` and builds the
+columns directly, instead of a full ``feedparser`` tree."""
+
+from io import BytesIO
+import xml.etree.ElementTree as ET
+
+#: Namespaces of the arXiv Atom feed
+ATOM = '{http://www.w3.org/2005/Atom}'
+ARXIV = '{http://arxiv.org/schemas/atom}'
+OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
+
+#: Text fields of an entry, by tag
+FIELDS = {ATOM + 'id': 'id',
+          ATOM + 'published': 'published',
+          ATOM + 'updated': 'updated',
+          ATOM + 'title': 'title',
+          ATOM + 'summary': 'summary'}
+
+def get_arxiv_path(paper_id, category, version):
+    """Create the arXiv path.
+
+    :param paper_id: id of the e-print.
+    :type paper_id: str
+
+    :param category: category of the paper (if category == 'abs' then it uses only the `paper_id`).
+    :type category: str
+
+    :param version: version of the e-print.
+    :type version: str"""
+    # e-print newer than 2007
+    if category == 'abs':
+        return ''.join(['arxiv/pdf/', paper_id[:4], '/', paper_id, 'v', version, '.pdf'])
+    return ''.join([category, '/pdf/', paper_id[:4], '/', paper_id, 'v', version, '.pdf'])
+
+def parse_total_results(text) -> int:
+    """Returns the total number of results of a query.
+
+    :param text: Atom feed returned by the arXiv API.
+    :type text: str"""
+    for _, elem in ET.iterparse(BytesIO(text.encode('utf-8'))):
+        if elem.tag == OPENSEARCH + 'totalResults':
+            return int(elem.text)
+    raise RuntimeError('Error, no total results in the feed')
+
+def parse_entries(text, abstracts=False) -> dict:
+    """Returns the e-prints of a page as columns: 'id', 'published',
+    'updated', 'version', 'primary_category', 'all_categories', 'arxiv_path',
+    'http_link' (and 'title', 'summary' if `abstracts`).
+
+    :param text: Atom feed returned by the arXiv API.
+    :type text: str
+
+    :param abstracts: Returns also titles and abstracts, with normalized
+        whitespaces.
+    :type abstracts: bool"""
+    query_data = {'id': [],
+                  'published': [],
+                  'updated': [],
+                  'version': [],
+                  'primary_category': [],
+                  'all_categories': [],
+                  'arxiv_path': [],
+                  'http_link': []}
+    if abstracts:
+        query_data['title'] = []
+        query_data['summary'] = []
+
+    # Fields of the current entry, None outside of an entry
+    entry = None
+    for event, elem in ET.iterparse(BytesIO(text.encode('utf-8')),
+                                    events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == ATOM + 'entry':
+                entry = {'tags': [], 'link': None}
+        elif entry is None:
+            continue
+        elif tag in FIELDS:
+            entry[FIELDS[tag]] = elem.text
+        elif tag == ATOM + 'category':
+            entry['tags'].append(elem.get('term'))
+        elif tag == ARXIV + 'primary_category':
+            entry['primary_category'] = elem.get('term')
+        elif tag == ATOM + 'link':
+            if entry['link'] is None and elem.get('rel', 'alternate') == 'alternate':
+                entry['link'] = elem.get('href')
+        elif tag == ATOM + 'entry':
+            # Get information from the link: http://arxiv.org/abs/<category>/<id>v<version>
+            _, category, id_version = entry['id'].rsplit('/', 2)
+            paper_id, _, version = id_version.rpartition('v')
+
+            query_data['id'].append(paper_id)
+            query_data['published'].append(entry['published'])
+            query_data['updated'].append(entry['updated'])
+            query_data['version'].append(version)
+            query_data['primary_category'].append(entry['primary_category'])
+            query_data['all_categories'].append(entry['tags'])
+            query_data['arxiv_path'].append(get_arxiv_path(paper_id,
+                                                           category,
+                                                           version))
+            query_data['http_link'].append(entry['link']
+                                           .replace('http://', 'http://export.')
+                                           .replace('abs', 'pdf')
+                                           + '.pdf')
+            if abstracts:
+                query_data['title'].append(' '.join((entry.get('title') or '').split()))
+                query_data['summary'].append(' '.join((entry.get('summary') or '').split()))
+
+            # Free the memory of the parsed entry
+            entry = None
+            elem.clear()
+    return query_data
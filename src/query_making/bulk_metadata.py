@@ -0,0 +1,151 @@
+"""BulkMetadata class definition, used to retrieve e-prints of categories from
+a local arXiv metadata snapshot instead of the arXiv API. The snapshot is the
+JSON lines file published on Kaggle (one e-print per line, optionally
+compressed with gzip): https://www.kaggle.com/Cornell-University/arxiv"""
+
+import os
+import gzip
+import json
+import pandas as pd
+
+from . import atom_parser
+from .csv_sink import CSVAppendSink
+from .query_arxiv_cat import QueryArXivCat
+
+class BulkMetadata:
+    """This class reads the snapshot once and writes the e-prints of all
+    `categories`, with the same columns as :class:`.query_arxiv_cat.QueryArXivCat`
+    (with titles and abstracts).
+
+    :param snapshot_path: Path to the metadata snapshot (.json or .json.gz).
+    :type snapshot_path: :class: `pathlib.PurePath`
+
+    :param result_folder: Path to the result folder where .csv data will be
+        stored.
+    :type result_folder: :class: `pathlib.PurePath`
+
+    :param categories: arXiv categories.
+    :type categories: [str]"""
+
+    #: Format of the dates of versions in the snapshot
+    DATE_FORMAT = '%a, %d %b %Y %H:%M:%S GMT'
+
+    def __init__(self, snapshot_path, result_folder, categories):
+        #: Path to the metadata snapshot
+        self.snapshot_path = snapshot_path
+        #: Path to the result folder
+        self.result_folder = result_folder
+        #: arXiv categories
+        self.categories = list(categories)
+
+        #: Number of e-prints buffered before being appended to a file
+        self.CHUNK_SIZE = 10000
+
+    def processing(self):
+        """Reads the snapshot and writes a .csv file per category. Categories
+        already written are skipped."""
+        # Categories still to do
+        categories = []
+        for category in self.categories:
+            checkpoint = CSVAppendSink(self.__result_path(category)).resume()
+            if checkpoint is not None and checkpoint.get('done', False):
+                print('Category : {}; Already retrieved'.format(category))
+            else:
+                categories.append(category)
+        if len(categories) == 0:
+            return
+
+        # Unsorted e-prints, appended by chunks while the snapshot is read
+        sinks = {category: CSVAppendSink(str(self.__result_path(category)) + '.bulk')
+                 for category in categories}
+        buffers = {category: [] for category in categories}
+
+        opener = gzip.open if str(self.snapshot_path).endswith('.gz') else open
+        with opener(self.snapshot_path, 'rt', encoding='utf-8') as snapshot:
+            for nb_lines, line in enumerate(snapshot):
+                # Debug
+                if nb_lines % 100000 == 0:
+                    print('Snapshot : {} e-prints read'.format(nb_lines))
+
+                # Avoid decoding lines without any wanted category
+                if not any(category in line for category in categories):
+                    continue
+                record = json.loads(line)
+                record_categories = record['categories'].split()
+                for category in categories:
+                    if category in record_categories:
+                        buffers[category].append(self.get_row(record, record_categories))
+                        if len(buffers[category]) >= self.CHUNK_SIZE:
+                            sinks[category].append(pd.DataFrame(buffers[category]))
+                            buffers[category] = []
+
+        # Sort each category, as retrieved from the API
+        for category in categories:
+            sinks[category].append(pd.DataFrame(buffers[category],
+                                                columns=self.__columns()))
+            self.__sort_category(sinks[category].path,
+                                 self.__result_path(category))
+            print('Category : {}; Article retrieved {}'.format(
+                category, sinks[category].rows))
+
+    def get_row(self, record, record_categories):
+        """Converts a record of the snapshot into a row of a category .csv
+        file.
+
+        :param record: decoded line of the snapshot.
+        :type record: dict
+
+        :param record_categories: categories of the record.
+        :type record_categories: [str]"""
+        # Ids older than 2007 contain their archive: 'cs/9809007'
+        if '/' in record['id']:
+            archive, paper_id = record['id'].split('/')
+            link_id = record['id']
+        else:
+            archive, paper_id = 'abs', record['id']
+            link_id = paper_id
+        version = record['versions'][-1]['version'][1:]
+
+        return {'id': paper_id,
+                'published': record['versions'][0]['created'],
+                'updated': record['versions'][-1]['created'],
+                'version': version,
+                'primary_category': record_categories[0],
+                'all_categories': record_categories,
+                'arxiv_path': atom_parser.get_arxiv_path(paper_id, archive, version),
+                'http_link': ''.join(['http://export.arxiv.org/pdf/', link_id,
+                                      'v', version, '.pdf']),
+                'title': ' '.join(record['title'].split()),
+                'summary': ' '.join(record['abstract'].split())}
+
+    def __sort_category(self, bulk_path, result_path):
+        """Sorts the e-prints of a category by submission date, converts
+        dates to the format of the API and writes the final .csv file.
+
+        :param bulk_path: path to the unsorted .csv file, removed at the end.
+        :type bulk_path: :class:`pathlib.PurePath`
+
+        :param result_path: path to the final .csv file.
+        :type result_path: :class:`pathlib.PurePath`"""
+        df = pd.read_csv(bulk_path, index_col=0, dtype='str')
+        for column in ['published', 'updated']:
+            df[column] = pd.to_datetime(df[column], format=self.DATE_FORMAT) \
+                           .dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        df['key'] = QueryArXivCat.get_keys(df)
+        df = df.sort_values(['published', 'key']).drop('key', axis=1)
+
+        sink = CSVAppendSink(result_path)
+        sink.append(df)
+        sink.finish()
+        os.remove(bulk_path)
+        os.remove(str(bulk_path) + '.progress')
+
+    def __result_path(self, category):
+        """Path to the .csv file of a category."""
+        return self.result_folder.joinpath(category + '.csv')
+
+    @staticmethod
+    def __columns():
+        """Columns of a category .csv file."""
+        return ['id', 'published', 'updated', 'version', 'primary_category',
+                'all_categories', 'arxiv_path', 'http_link', 'title', 'summary']
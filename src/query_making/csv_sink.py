@@ -0,0 +1,99 @@
+"""CSVAppendSink class definition, used to write a .csv file chunk by chunk
+without rewriting what is already on the disk."""
+
+import os
+import json
+from pathlib import PurePath
+
+class CSVAppendSink:
+    """Appends :class:`pandas.DataFrame` chunks at the end of a .csv file. The
+    index of each chunk is shifted, so the final file is exactly the one
+    written by ``pd.concat(chunks, ignore_index=True).to_csv(path)``.
+
+    After each chunk, a small progress marker (``<path>.progress``) is synced
+    on the disk. It contains the number of rows and bytes already written, and
+    the optional `progress` information given to :meth:`append`. It is used
+    as a checkpoint by :meth:`resume` to continue an interrupted writing.
+
+    :param path: Path to the .csv file.
+    :type path: :class:`pathlib.PurePath`"""
+    def __init__(self, path):
+        #: Path to the .csv file
+        self.path = PurePath(path)
+        #: Path to the progress marker
+        self.marker_path = PurePath(str(self.path) + '.progress')
+        #: Number of rows already written
+        self.rows = 0
+        #: Size of the .csv file already written (in bytes)
+        self.bytes = 0
+        #: Last information saved into the progress marker
+        self.progress = {}
+
+    def resume(self):
+        """Restores the state saved into the progress marker and truncates
+        the .csv file to the last complete chunk. Returns the saved marker, or
+        None if there is nothing to resume (the file is then rewritten)."""
+        if not os.path.exists(self.marker_path) or not os.path.exists(self.path):
+            return None
+
+        with open(self.marker_path, 'r') as marker_file:
+            marker = json.load(marker_file)
+
+        # The .csv file must contain at least what the marker has saved
+        if os.path.getsize(self.path) < marker['bytes']:
+            return None
+
+        # Remove a chunk partially written after the last marker
+        with open(self.path, 'r+b') as csv_file:
+            csv_file.truncate(marker['bytes'])
+
+        self.rows = marker.pop('rows')
+        self.bytes = marker.pop('bytes')
+        self.progress = marker
+        return marker
+
+    def append(self, df, progress=None) -> None:
+        """Appends `df` at the end of the .csv file, then updates the progress
+        marker.
+
+        :param df: rows to append, the header is written with the first chunk.
+        :type df: :class:`pandas.DataFrame`
+
+        :param progress: extra information saved into the progress marker.
+        :type progress: dict"""
+        # Continue the index of previous chunks
+        df.index = range(self.rows, self.rows + len(df))
+
+        # The header is written only once, with the first chunk
+        mode = 'a' if self.bytes > 0 else 'w'
+        with open(self.path, mode, newline='') as csv_file:
+            df.to_csv(csv_file, header=(mode == 'w'))
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+            self.bytes = os.fstat(csv_file.fileno()).st_size
+
+        self.rows += len(df)
+        self.write_marker(progress)
+
+    def finish(self) -> None:
+        """Marks the writing as done into the progress marker."""
+        self.write_marker({'done': True})
+
+    def write_marker(self, progress=None) -> None:
+        """Writes and syncs the progress marker. The marker is replaced
+        atomically, so it is always readable.
+
+        :param progress: extra information saved into the marker, it is
+            merged with the previous one.
+        :type progress: dict"""
+        if progress is not None:
+            self.progress.update(progress)
+        marker = {'rows': self.rows, 'bytes': self.bytes}
+        marker.update(self.progress)
+
+        tmp_path = str(self.marker_path) + '.tmp'
+        with open(tmp_path, 'w') as marker_file:
+            json.dump(marker, marker_file)
+            marker_file.flush()
+            os.fsync(marker_file.fileno())
+        os.replace(tmp_path, self.marker_path)
@@ -0,0 +1,95 @@
+"""Security considerations keywords, used to find e-prints with security
+considerations, either with the arXiv API or locally from their title and
+abstract."""
+
+import os
+import re
+import pandas as pd
+
+from .csv_sink import CSVAppendSink
+from .query_arxiv_cat import QueryArXivCat
+
+#: Keywords of security considerations, '*' is a wildcard for the end of word
+CYBER_KEYWORDS = ['secur*',
+                  'safe*',
+                  'reliability',
+                  'dependability',
+                  'confidentiality',
+                  'integrity',
+                  'availability',
+                  'defen*',
+                  'priva*']
+
+#: Columns only used to find security considerations locally
+TEXT_COLUMNS = ['title', 'summary']
+
+def format_query(keywords=CYBER_KEYWORDS):
+    """Formats `keywords` into an arXiv API query on titles and abstracts.
+
+    :param keywords: keywords of security considerations.
+    :type keywords: [str]"""
+    query_formater = lambda key: 'ti:' + key + ' OR abs:' + key
+    return '%28' + ' OR '.join([query_formater(key) for key in keywords]) + '%29'
+
+def keywords_regex(keywords=CYBER_KEYWORDS):
+    """Converts `keywords` into a regular expression with the same wildcard
+    semantics as the arXiv API : 'secur*' matches every word starting with
+    'secur', other keywords match only the whole word.
+
+    :param keywords: keywords of security considerations.
+    :type keywords: [str]"""
+    patterns = []
+    for key in keywords:
+        if key.endswith('*'):
+            patterns.append(re.escape(key[:-1]) + r'\w*')
+        else:
+            patterns.append(re.escape(key) + r'\b')
+    return r'\b(?:' + '|'.join(patterns) + ')'
+
+def cyber_mask(df, keywords=CYBER_KEYWORDS):
+    """Returns a boolean :class:`pandas.Series`, True if the title or the
+    abstract of the e-print contains one of the `keywords` (case insensitive).
+
+    :param df: e-prints with the 'title' and 'summary' columns.
+    :type df: :class:`pandas.DataFrame`
+
+    :param keywords: keywords of security considerations.
+    :type keywords: [str]"""
+    text = df['title'].fillna('') + ' ' + df['summary'].fillna('')
+    return text.str.contains(keywords_regex(keywords),
+                             case=False,
+                             regex=True)
+
+def write_cyber_subset(e_prints_path, cyber_path, previous_cyber_path=None):
+    """Writes the e-prints with security considerations of `e_prints_path`
+    into `cyber_path`, with the same columns as a file retrieved with the
+    arXiv API.
+
+    :param e_prints_path: path to the .csv file of all e-prints of a category,
+        retrieved with titles and abstracts.
+    :type e_prints_path: :class:`pathlib.PurePath`
+
+    :param cyber_path: path to the .csv file to write.
+    :type cyber_path: :class:`pathlib.PurePath`
+
+    :param previous_cyber_path: path to the file of a previous snapshot, its
+        e-prints are kept when their title and abstract are unknown (i.e. from
+        a snapshot retrieved without them), matched by key (see
+        :meth:`.QueryArXivCat.get_keys`).
+    :type previous_cyber_path: :class:`pathlib.PurePath`"""
+    df = pd.read_csv(e_prints_path, index_col=0, dtype='str')
+
+    mask = cyber_mask(df)
+    if previous_cyber_path is not None and os.path.exists(previous_cyber_path):
+        # Ids older than 2007 are only unique inside their archive
+        previous = pd.read_csv(previous_cyber_path,
+                               usecols=['id', 'arxiv_path'],
+                               dtype='str')
+        unknown_text = df['title'].isna() & df['summary'].isna()
+        mask = mask | (unknown_text & QueryArXivCat.get_keys(df).isin(
+            QueryArXivCat.get_keys(previous)))
+
+    sink = CSVAppendSink(cyber_path)
+    sink.append(df[mask].drop(TEXT_COLUMNS, axis=1))
+    sink.finish()
+    print('Cyber : {} e-prints on {}'.format(sink.rows, len(df)))
@@ -0,0 +1,190 @@
+"""EPrintStore class definition, a single SQLite table of e-prints shared by
+all categories, so that cross-listed e-prints are stored and scored once."""
+
+import sqlite3
+import pandas as pd
+
+from .csv_sink import CSVAppendSink
+from .query_arxiv_cat import QueryArXivCat
+
+class EPrintStore:
+    """Stores each e-print once, keyed by '<archive>/<id>' (see
+    :meth:`.query_arxiv_cat.QueryArXivCat.get_keys`), with a membership table
+    linking e-prints to categories. The per-category .csv files used by the
+    rest of the pipeline are views generated from the store.
+
+    :param path: Path to the SQLite database, created if it doesn't exist.
+    :type path: :class:`pathlib.PurePath`"""
+
+    #: Columns of a per-category .csv file
+    COLUMNS = ['id',
+               'published',
+               'updated',
+               'version',
+               'primary_category',
+               'all_categories',
+               'arxiv_path',
+               'http_link']
+    #: Optional columns, stored only by a harvest with abstracts
+    TEXT_COLUMNS = ['title', 'summary']
+
+    def __init__(self, path):
+        #: Connection to the database
+        self.connection = sqlite3.connect(str(path))
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS eprints (
+                key TEXT PRIMARY KEY,
+                id TEXT,
+                published TEXT,
+                updated TEXT,
+                version TEXT,
+                primary_category TEXT,
+                all_categories TEXT,
+                arxiv_path TEXT,
+                http_link TEXT,
+                title TEXT,
+                summary TEXT,
+                opinion REAL
+            );
+            CREATE TABLE IF NOT EXISTS membership (
+                category TEXT,
+                key TEXT,
+                cyber INTEGER DEFAULT 0,
+                PRIMARY KEY (category, key)
+            );
+            CREATE INDEX IF NOT EXISTS eprints_published ON eprints (published, key);
+        ''')
+
+    def add_category(self, category, csv_path, cyber=False) -> None:
+        """Adds the e-prints of a category .csv file into the store. An
+        e-print already stored is updated, its opinion is kept if its version
+        didn't change.
+
+        :param category: arXiv category.
+        :type category: str
+
+        :param csv_path: path to the .csv file retrieved for this category.
+        :type csv_path: :class:`pathlib.PurePath`
+
+        :param cyber: the file contains only e-prints with security
+            considerations (they must already be members of the category).
+        :type cyber: bool"""
+        df = pd.read_csv(csv_path, index_col=0, dtype='str')
+        df['key'] = QueryArXivCat.get_keys(df)
+        df = df.astype(object).where(df.notna(), None)
+
+        with self.connection:
+            if cyber:
+                self.connection.executemany(
+                    'UPDATE membership SET cyber = 1 WHERE category = ? AND key = ?',
+                    [(category, key) for key in df['key']])
+                return
+
+            for column in self.TEXT_COLUMNS:
+                if column not in df.columns:
+                    df[column] = None
+            columns = ['key'] + self.COLUMNS + self.TEXT_COLUMNS
+            self.connection.executemany(
+                '''INSERT INTO eprints ({0}) VALUES ({1})
+                   ON CONFLICT (key) DO UPDATE SET
+                       {2},
+                       opinion = CASE WHEN eprints.version = excluded.version
+                                      THEN eprints.opinion END'''.format(
+                    ', '.join(columns),
+                    ', '.join(['?'] * len(columns)),
+                    ', '.join(['{0} = COALESCE(excluded.{0}, eprints.{0})'.format(col)
+                               for col in columns[1:]])),
+                df[columns].itertuples(index=False, name=None))
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO membership (category, key) VALUES (?, ?)',
+                [(category, key) for key in df['key']])
+
+    def categories(self):
+        """Returns the list of stored categories."""
+        return [row[0] for row in self.connection.execute(
+            'SELECT DISTINCT category FROM membership ORDER BY category')]
+
+    def get_category(self, category, cyber=False):
+        """Returns the e-prints of a category, sorted by submission date, as
+        they are in a per-category .csv file.
+
+        :param category: arXiv category.
+        :type category: str
+
+        :param cyber: returns only e-prints with security considerations.
+        :type cyber: bool"""
+        query = '''SELECT e.*
+                   FROM membership AS m JOIN eprints AS e ON e.key = m.key
+                   WHERE m.category = ?{}
+                   ORDER BY e.published, e.key'''.format(
+            ' AND m.cyber = 1' if cyber else '')
+        return pd.read_sql_query(query,
+                                 self.connection,
+                                 params=(category,))
+
+    def export_category(self, category, csv_path, cyber=False) -> None:
+        """Writes the per-category .csv file of `category` from the store.
+
+        :param category: arXiv category.
+        :type category: str
+
+        :param csv_path: path to the .csv file to write.
+        :type csv_path: :class:`pathlib.PurePath`
+
+        :param cyber: writes only e-prints with security considerations.
+        :type cyber: bool"""
+        df = self.get_category(category, cyber)
+        columns = list(self.COLUMNS)
+        if df['title'].notna().any() and not cyber:
+            columns += self.TEXT_COLUMNS
+
+        sink = CSVAppendSink(csv_path)
+        sink.append(df[columns])
+        sink.finish()
+
+    def unscored_paths(self):
+        """Returns a :class:`pandas.Series` of arXiv paths indexed by
+        versioned key ('<key>v<version>'), for all e-prints without an
+        opinion. A revised e-print gets a new index, so an opinion of its
+        previous version is never taken for it."""
+        df = pd.read_sql_query('''SELECT key || 'v' || version AS key, arxiv_path
+                                  FROM eprints
+                                  WHERE opinion IS NULL''',
+                               self.connection,
+                               index_col='key')
+        return df['arxiv_path']
+
+    def load_opinions(self, csv_path) -> None:
+        """Saves into the store the opinions of a .csv file indexed by
+        versioned key (see :meth:`unscored_paths`). An opinion is saved only
+        if the e-print still has this version.
+
+        :param csv_path: path to the opinion .csv file.
+        :type csv_path: :class:`pathlib.PurePath`"""
+        df = pd.read_csv(csv_path, index_col=0, dtype='str')
+        with self.connection:
+            self.connection.executemany(
+                'UPDATE eprints SET opinion = ? WHERE key = ? AND version = ?',
+                [(float(opinion),) + tuple(versioned_key.rsplit('v', 1))
+                 for versioned_key, opinion in df['opinion'].items()])
+
+    def export_opinion(self, category, csv_path) -> None:
+        """Writes the opinion .csv file of `category`, indexed like the rows
+        of :meth:`export_category`.
+
+        :param category: arXiv category.
+        :type category: str
+
+        :param csv_path: path to the .csv file to write.
+        :type csv_path: :class:`pathlib.PurePath`"""
+        df = pd.read_sql_query('''SELECT e.opinion
+                                  FROM membership AS m JOIN eprints AS e ON e.key = m.key
+                                  WHERE m.category = ?
+                                  ORDER BY e.published, e.key''',
+                               self.connection,
+                               params=(category,))
+        df.dropna().to_csv(csv_path, mode='w')
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        self.connection.close()
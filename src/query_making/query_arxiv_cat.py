@@ -1,14 +1,14 @@
 """QueryArXivCat class definition, used to retrieve arXiv following the arXiv
 API : https://arxiv.org/help/api/user-manual"""
 
-import time
-import re
-import traceback
-import logging
-import requests
-import feedparser
+import os
+from datetime import datetime, timedelta, timezone
 import pandas as pd
 
+from . import atom_parser
+from .csv_sink import CSVAppendSink
+from .arxiv_client import ArXivClient
+
 class QueryArXivCat:
     """This class retrieve all URLs of e-prints of categories contained in
     `categories`.
@@ -21,9 +21,20 @@ class QueryArXivCat:
     :type category: str
 
     :param cyber_keywords: Pre-formated queries of security considerations keywords.
-    :type cyber_keywords: str"""
+    :type cyber_keywords: str
+
+    :param since: Path to the folder of a previous snapshot. If given, only
+        e-prints submitted after the newest one of this snapshot are retrieved
+        and merged with it.
+    :type since: :class: `pathlib.PurePath`
+
+    :param abstracts: Store also the title and the abstract (summary) of
+        e-prints, used to find security considerations locally.
+    :type abstracts: bool
+
+    :param url: URL of the arXiv API, can be a local stub server.
+    :type url: str"""
 
-    __URL = 'http://export.arxiv.org/api/query'
     __PARAMS = {
         'search_query': '',
         'start': 1,
@@ -31,13 +42,22 @@ class QueryArXivCat:
         'sortBy': 'submittedDate',
         'sortOrder': 'ascending'
     }
-    def __init__(self, result_folder, category, cyber_keywords=None) :
+    def __init__(self, result_folder, category, cyber_keywords=None, since=None,
+                 abstracts=False, url=None) :
         #: `pandas.Series` which contain categories
         self.category = category
         #: Path to the result folder
         self.result_folder = result_folder
         #: Formated query of security considerations keywords
         self.cyber_keywords = cyber_keywords
+        #: Folder of the previous snapshot, for a delta harvest
+        self.since = since
+        #: Range of submission dates ('YYYYMMDDhhmm', 'YYYYMMDDhhmm') to query
+        self.date_range = None
+        #: Store titles and abstracts
+        self.abstracts = abstracts
+        #: Client of the arXiv API, rate limited
+        self.client = ArXivClient(url)
 
         #: Number max of loop, if a query doesn't work
         self.MAX_LOOP = 20
@@ -45,6 +65,10 @@ class QueryArXivCat:
         self.MAX_QUERY_RESULT = 1000
         #: arXiv API doesn't allow to retrieve more than 50 000 e-prints
         self.ARXIV_LIMIT = 50000
+        #: Submission date of the first arXiv e-print
+        self.ARXIV_START = '199101010000'
+        #: Keys already retrieved, to de-duplicate e-prints of date windows
+        self.seen_keys = None
 
     @staticmethod
     def get_arxiv_path(paper_id, category, version):
@@ -58,53 +82,214 @@ class QueryArXivCat:
 
         :param version: version of the e-print.
         :type version: str"""
-        # e-print newer than 2007
-        if category == 'abs':
-            return ''.join(['arxiv/pdf/', paper_id[:4], '/', paper_id, 'v', version, '.pdf'])
-        return ''.join([category, '/pdf/', paper_id[:4], '/', paper_id, 'v', version, '.pdf'])
+        return atom_parser.get_arxiv_path(paper_id, category, version)
+
+    @staticmethod
+    def get_keys(df):
+        """Returns the unique key of e-prints ('<archive>/<id>'). Ids older
+        than 2007 are only unique inside their archive (ex: 'cs/0609028' and
+        'quant-ph/0609028').
+
+        :param df: e-prints with the 'id' and 'arxiv_path' columns.
+        :type df: :class:`pandas.DataFrame`"""
+        return df['arxiv_path'].str.split('/').str[0] + '/' + df['id']
 
     def processing(self):
-        """Execute queries on arXiv"""
-        # Number max of result for this category
+        """Execute queries on arXiv. The progress is checkpointed after each
+        page, so an interrupted category continues where it stopped and a
+        finished one is skipped."""
         category = self.category
+
+        # Result file, written page by page
         if self.cyber_keywords is None:
-            max_results = self.__get_max_results('cat:{}'.format(category))
+            file_name = category + '.csv'
         else:
-            print('cyber')
-            max_results = self.__get_max_results('cat:{}'.format(category)
-                                                 + ' AND '
-                                                 + self.cyber_keywords)
-
-        print('Max articles : ' + str(max_results))
+            file_name = category + '_cyber.csv'
+        sink = CSVAppendSink(self.result_folder.joinpath(file_name))
+
+        # Restore the checkpoint of an interrupted run
+        checkpoint = sink.resume()
+        if checkpoint is not None and checkpoint.get('done', False):
+            print('Category : {}; Already retrieved'.format(category))
+            return
+
+        # Delta harvest: only e-prints newer than the previous snapshot are
+        # retrieved into a separate file, merged at the end
+        previous_path = None
+        if self.since is not None:
+            previous_path = self.since.joinpath(file_name)
+            if os.path.exists(previous_path):
+                previous = pd.read_csv(previous_path,
+                                       usecols=['published'],
+                                       dtype='str')
+                self.date_range = (self.to_api_date(previous['published'].max()),
+                                   self.to_api_date(None))
+                sink = CSVAppendSink(self.result_folder.joinpath(file_name + '.delta'))
+                checkpoint = sink.resume()
+            else:
+                print('Category : {}; Not in the previous snapshot'.format(category))
+                previous_path = None
+
+        if checkpoint is None:
+            checkpoint = {'offset': 0, 'sort_order': 'ascending'}
+        elif not checkpoint.get('done', False):
+            print('Category : {}; Resume at {} (window {}), last id {}'.format(
+                category,
+                checkpoint['offset'],
+                checkpoint.get('window', 0),
+                checkpoint.get('last_id')))
+
+        if not checkpoint.get('done', False):
+            self.__harvest(sink, checkpoint)
+            sink.finish()
+
+        if previous_path is not None:
+            self.merge_delta(previous_path,
+                             sink.path,
+                             self.result_folder.joinpath(file_name))
+
+    def __harvest(self, sink, checkpoint):
+        """Retrieves all e-prints of the query into `sink`. If there are more
+        e-prints than the arXiv limit, the query is split into windows of
+        submission dates, each of them under the limit.
+
+        :param sink: result file.
+        :type sink: :class:`.csv_sink.CSVAppendSink`
+
+        :param checkpoint: restored checkpoint, with the offset (and the
+            window) where to start.
+        :type checkpoint: dict"""
+        category = self.category
 
         # Init parameters
         parameters = dict(self.__PARAMS)
         parameters['max_results'] = self.MAX_QUERY_RESULT
 
-        # Total dataframes
-        total_data = []
-
-        # Little trick to pass throught the arxiv limit
-        if max_results <= self.ARXIV_LIMIT:
+        # Windows are saved into the checkpoint, they are computed only once
+        windows = checkpoint.get('windows')
+        if windows is None:
+            # Number max of result for this category
+            if self.cyber_keywords is not None:
+                print('cyber')
+            max_results = self.__get_max_results(self.__search_query())
+
+            print('Max articles : ' + str(max_results))
+
+            if max_results <= self.ARXIV_LIMIT:
+                self.get_eprints(parameters,
+                                  max_results,
+                                  category,
+                                  sink,
+                                  checkpoint['offset'])
+                return
+
+            if self.date_range is None:
+                date_range = (self.ARXIV_START, self.to_api_date(None))
+            else:
+                date_range = self.date_range
+            windows = self.__split_windows(date_range, max_results)
+            print('Split into {} windows'.format(len(windows)))
+
+        # E-prints already retrieved in previous windows
+        if sink.rows > 0:
+            self.seen_keys = set(self.get_keys(pd.read_csv(sink.path,
+                                                           usecols=['id', 'arxiv_path'],
+                                                           dtype='str')))
+        else:
+            self.seen_keys = set()
+
+        offset = checkpoint['offset']
+        for window in range(checkpoint.get('window', 0), len(windows)):
+            start, end, max_results = windows[window]
+            self.date_range = (start, end)
+            sink.write_marker({'windows': windows,
+                               'window': window,
+                               'offset': offset})
+            print('Window {} : {} to {}, {} e-prints'.format(window, start, end,
+                                                             max_results))
             self.get_eprints(parameters,
                               max_results,
                               category,
-                              total_data)
-        elif max_results <= 2 * self.ARXIV_LIMIT:
-            total_data = self.get_eprints(parameters,
-                                           self.ARXIV_LIMIT,
-                                           category,
-                                           total_data)
-            # Re ordering
-            parameters['sortOrder'] = 'descending'
-            self.get_eprints(parameters,
-                              max_results - self.ARXIV_LIMIT,
-                              category,
-                              total_data)
-        else:
-            raise RuntimeError('Error, too much e-prints')
+                              sink,
+                              offset)
+            offset = 0
+
+    def __split_windows(self, date_range, nb_results):
+        """Recursively splits `date_range` in two halves, until each window
+        contains less e-prints than the arXiv limit. Returns the list of
+        windows [start, end, number of e-prints].
+
+        :param date_range: range of submission dates ('YYYYMMDDhhmm',
+            'YYYYMMDDhhmm'), both included.
+        :type date_range: (str, str)
+
+        :param nb_results: number of e-prints in `date_range`.
+        :type nb_results: int"""
+        if nb_results <= self.ARXIV_LIMIT:
+            return [[date_range[0], date_range[1], nb_results]]
+
+        start = datetime.strptime(date_range[0], '%Y%m%d%H%M')
+        end = datetime.strptime(date_range[1], '%Y%m%d%H%M')
+        if end <= start:
+            raise RuntimeError('Error, too much e-prints in {}'.format(date_range[0]))
+
+        # Disjoint halves, dates have a precision of one minute
+        middle = start + (end - start) // 2
+        middle = middle.replace(second=0, microsecond=0)
+        left = (date_range[0], middle.strftime('%Y%m%d%H%M'))
+        right = ((middle + timedelta(minutes=1)).strftime('%Y%m%d%H%M'),
+                 date_range[1])
+
+        windows = []
+        for half in (left, right):
+            self.date_range = half
+            nb_half = self.__get_max_results(self.__search_query())
+            windows += self.__split_windows(half, nb_half)
+        return windows
+
+    @staticmethod
+    def merge_delta(previous_path, delta_path, result_path):
+        """Merges the e-prints of a previous snapshot with the newly retrieved
+        ones, then removes the delta file. If an e-print (same key, see
+        :meth:`get_keys`) is in both files, the new one is kept.
 
-    def get_eprints(self, parameters, max_results, category, total_data):
+        :param previous_path: path to the .csv file of the previous snapshot.
+        :type previous_path: :class:`pathlib.PurePath`
+
+        :param delta_path: path to the .csv file of new e-prints.
+        :type delta_path: :class:`pathlib.PurePath`
+
+        :param result_path: path to the merged .csv file.
+        :type result_path: :class:`pathlib.PurePath`"""
+        previous = pd.read_csv(previous_path, index_col=0, dtype='str')
+        delta = pd.read_csv(delta_path, index_col=0, dtype='str')
+
+        merged = pd.concat([previous, delta], ignore_index=True)
+        merged = merged[~QueryArXivCat.get_keys(merged).duplicated(keep='last')]
+
+        # Written as a single chunk, then marked as done
+        sink = CSVAppendSink(result_path)
+        sink.append(merged, {'delta': len(delta)})
+        sink.finish()
+
+        os.remove(delta_path)
+        os.remove(str(delta_path) + '.progress')
+        print('Merged : {} new e-prints, {} in total'.format(len(delta),
+                                                              len(merged)))
+
+    @staticmethod
+    def to_api_date(date):
+        """Converts a date into the format of the `submittedDate` field of the
+        arXiv API.
+
+        :param date: date of an e-print (ex: '2021-11-10T17:59:59Z'), now if
+            None.
+        :type date: str"""
+        if date is None:
+            return datetime.now(timezone.utc).strftime('%Y%m%d%H%M')
+        return pd.to_datetime(date).strftime('%Y%m%d%H%M')
+
+    def get_eprints(self, parameters, max_results, category, sink, offset=0):
         """Get all eprints of a category
 
         :param parameters: restAPI parameters.
@@ -116,54 +301,36 @@ class QueryArXivCat:
         :param category: name of the desired category to retrieve.
         :type category: str
 
-        :param total_data: list of eprints already retrieved.
-        :type total_data: [:class:`pandas.DataFrame`]"""
-        # Offset of the query
-        offset = 0
+        :param sink: result file, each retrieved page is appended to it.
+        :type sink: :class:`.csv_sink.CSVAppendSink`
+
+        :param offset: offset of the first query, used to resume a checkpoint.
+        :type offset: int"""
         # Number of articles retrieved
-        nb_articles = 0
+        nb_articles = offset
         # Number max of unsuccessful queries
         max_loop = self.MAX_LOOP
+        # Query with MAX_QUERY_RESULT results
+        parameters['search_query'] = self.__search_query()
+        parameters['start'] = offset
+        next_page = self.client.submit(parameters) if nb_articles < max_results else None
         while max_loop != 0 and nb_articles < max_results:
-            # Query with MAX_QUERY_RESULT results
-            parameters['start'] = offset
-            if self.cyber_keywords is None:
-                parameters['search_query'] = 'cat:{}'.format(category)
-            else:
-                parameters['search_query'] = ('cat:{}'.format(category)
-                                              + ' AND '
-                                              + self.cyber_keywords)
-            # Do the request
-            req = self.__do_request_req(parameters)
+            text = next_page.result()
+            # The next page is requested while this one is processed, assuming
+            # that it is full
+            parameters['start'] = offset + self.MAX_QUERY_RESULT
+            next_page = None
+            if parameters['start'] < max_results:
+                next_page = self.client.submit(parameters)
             # Get data of the retrieve page
-            query_data = {'id': [],
-                          'published': [],
-                          'updated': [],
-                          'version': [],
-                          'primary_category': [],
-                          'all_categories': [],
-                          'arxiv_path': [],
-                          'http_link': []}
-
-            for entry in feedparser.parse(req.text).entries:
-                # Get information from the link
-                match = re.match('http.*/(.*)/(.*)v(.*)', entry.id)
-
-                query_data['id'].append(match.group(2))
-                query_data['published'].append(entry.published)
-                query_data['updated'].append(entry.updated)
-                query_data['version'].append(match.group(3))
-                query_data['primary_category'].append(entry.arxiv_primary_category['term'])
-                query_data['all_categories'].append([tag['term'] for tag in entry.tags])
-                query_data['arxiv_path'].append(self.get_arxiv_path(
-                    match.group(2),
-                    match.group(1),
-                    match.group(3)))
-                query_data['http_link'].append(entry.link \
-                                          .replace('http://', 'http://export.') \
-                                          .replace('abs', 'pdf') \
-                                          + '.pdf')
+            query_data = atom_parser.parse_entries(text, self.abstracts)
             nb_data = len(query_data['id'])
+            page = pd.DataFrame(query_data)
+            # Remove e-prints already retrieved in another window
+            if self.seen_keys is not None and nb_data > 0:
+                keys = self.get_keys(page)
+                page = page[~keys.isin(self.seen_keys)]
+                self.seen_keys.update(keys)
             # Avoid infinite looping
             if nb_data == 0 :
                 max_loop -= 1
@@ -174,46 +341,38 @@ class QueryArXivCat:
             nb_articles += nb_data
             offset = nb_articles
 
-            # Append actual data to get the total
-            total_data.append(pd.DataFrame(query_data))
-            # Write into csv
-            if self.cyber_keywords is None:
-                pd.concat(total_data, ignore_index=True).to_csv(
-                    self.result_folder.joinpath(category + '.csv'),
-                    mode='w')
-            else:
-                pd.concat(total_data, ignore_index=True).to_csv(
-                    self.result_folder.joinpath(category + '_cyber.csv'),
-                    mode='w')
+            # Request again the next page if this one was not full
+            if offset != parameters['start'] and nb_articles < max_results:
+                if next_page is not None:
+                    next_page.cancel()
+                parameters['start'] = offset
+                next_page = self.client.submit(parameters)
+
+            # Append only the new page into the csv and save the checkpoint
+            checkpoint = {'offset': offset,
+                          'sort_order': parameters['sortOrder']}
+            if nb_data > 0:
+                checkpoint['last_id'] = query_data['id'][-1]
+            sink.append(page, checkpoint)
 
             # Debug
             print('Category : {}; Article retrieved {}' \
                   .format(category, nb_articles))
-
-            # Requested by arXiv API
-            time.sleep(3)
-        return total_data
-
-    def __do_request_req(self, parameters, i=0):
-        """Recursive function for retry request if a bug occur.
-
-        :param parameters: restAPI parameters.
-        :type parameters: dict
-
-        :param i: recursive counter.
-        :type i: int"""
-        try:
-            print(str(i) + ' attempt')
-            return requests.get(self.__URL, params=parameters)
-        except KeyboardInterrupt:
-            # If ^C stop the infinite loop
-            logging.error(traceback.format_exc())
-            return None
-        except Exception as e:
-            # Retry if another error occur
-            logging.error(traceback.format_exc())
-            return self.__do_request_req(parameters, i + 1)
-
+        if next_page is not None:
+            next_page.cancel()
+        return sink
+
+
+    def __search_query(self):
+        """Formats the search query of the category, with the security
+        considerations keywords and the range of submission dates if they are
+        set."""
+        search_query = 'cat:{}'.format(self.category)
+        if self.cyber_keywords is not None:
+            search_query += ' AND ' + self.cyber_keywords
+        if self.date_range is not None:
+            search_query += ' AND submittedDate:[{} TO {}]'.format(*self.date_range)
+        return search_query
 
     def __get_max_results(self, search_query):
         """Do a request to obtain the size of a category.
@@ -226,5 +385,5 @@ class QueryArXivCat:
         parameters['start'] = 1
         parameters['max_results'] = 0
 
-        req = self.__do_request_req(parameters)
-        return int(feedparser.parse(req.text)['feed']['opensearch_totalresults'])
+        text = self.client.get(parameters)
+        return atom_parser.parse_total_results(text)